@@ -0,0 +1,37 @@
+"""Tendencias de vikruti y gunas a partir de los resúmenes mensuales (ver AyurvedaDB.get_monthly_trends)."""
+import numpy as np
+
+from database import TREND_FIELDS
+
+# Meses de la media móvil que suaviza las tendencias
+MOVING_WINDOW = 3
+
+
+def monthly_trends(rows, window=MOVING_WINDOW):
+    """Medias por mes de cada TREND_FIELDS a partir de las sumas mensuales.
+
+    Devuelve un diccionario con `meses`, `consultas` (por mes), `medias` y
+    `media_movil` (arrays meses x campos) y `cambio`: la media del último mes
+    menos la de los `window` meses anteriores, por campo (None si no hay datos).
+    """
+    months = [r[0] for r in rows]
+    data = np.array([tuple(r)[1:] for r in rows], dtype=np.float64).reshape(len(rows), len(TREND_FIELDS) + 1)
+    counts = data[:, 0]
+    means = data[:, 1:] / counts[:, None] if len(rows) else data[:, 1:]
+    return {
+        "meses": months,
+        "consultas": counts.astype(np.int64),
+        "medias": means,
+        "media_movil": moving_average(means, window),
+        "cambio": means[-1] - means[-1 - window:-1].mean(axis=0) if len(rows) > 1 else None,
+    }
+
+
+def moving_average(values, window):
+    """Media de cada columna sobre los últimos `window` meses (menos al principio de la serie)."""
+    if not len(values):
+        return values
+    totals = np.cumsum(values, axis=0)
+    totals[window:] = totals[window:] - totals[:-window]
+    sizes = np.minimum(np.arange(1, len(values) + 1), window)
+    return totals / sizes[:, None]
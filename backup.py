@@ -0,0 +1,63 @@
+"""Copias de seguridad en caliente de la base.
+
+La primera copia en un archivo es completa, con la API de backup de SQLite en
+pasos pequeños, sin parar la app. Las siguientes sobre el mismo archivo son
+incrementales: solo se le aplican los cambios registrados desde la anterior
+(ver AyurvedaDB.changes_since).
+"""
+import os
+import sqlite3
+
+from database import AyurvedaDB
+from sync import pull_changes
+
+# Páginas (de 4 KB) copiadas en cada paso de la copia completa
+BACKUP_STEP_PAGES = 256
+# Clave del cursor que guarda cada copia: hasta qué cambio del origen incluye
+BACKUP_CURSOR = "copia"
+
+
+def backup_database(db, path, progress=None, pages=BACKUP_STEP_PAGES):
+    """Copia `db` en `path`: completa la primera vez e incremental las siguientes.
+
+    `progress(texto)` recibe el avance. Devuelve ("completa", páginas) o
+    ("incremental", filas aplicadas).
+    """
+    if os.path.exists(path):
+        copy = AyurvedaDB(path)
+        try:
+            if copy.get_sync_cursor(BACKUP_CURSOR) is not None:
+                report = progress and (lambda n: progress(f"{n} cambios copiados"))
+                return "incremental", pull_changes(db.changes_since, copy, BACKUP_CURSOR, report)
+        finally:
+            copy.close()
+    return "completa", _full_backup(db, path, progress, pages)
+
+
+def _full_backup(db, path, progress, pages):
+    partial = path + ".parcial"
+    if os.path.exists(partial):
+        os.remove(partial)
+    copied = {"total": 0, "avisado": -1}
+
+    def on_step(status, remaining, total):
+        copied["total"] = total
+        # Un aviso cada 10 %, no uno por paso
+        percent = 100 * (total - remaining) // max(total, 1)
+        if progress and percent // 10 > copied["avisado"]:
+            copied["avisado"] = percent // 10
+            progress(f"Copiando: {percent} %")
+
+    target = sqlite3.connect(partial)
+    try:
+        cursor = db.backup_to(target, pages, on_step)
+    finally:
+        target.close()
+    copy = AyurvedaDB(partial)
+    try:
+        copy.set_sync_cursor(BACKUP_CURSOR, cursor)
+    finally:
+        copy.close()
+    # La copia anterior solo se sustituye cuando la nueva está completa
+    os.replace(partial, path)
+    return copied["total"]
@@ -0,0 +1,107 @@
+"""Micro-benchmark de latencia por llamada de AyurvedaDB.
+
+Compara la configuración actual (conexión persistente, WAL, sentencias
+preparadas en caché) con la anterior (una conexión nueva por llamada y
+SQLite sin ajustar) sobre la misma base de datos.
+
+    python benchmarks/bench_sqlite.py --pacientes 2000 --consultas 20000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from database import AyurvedaDB, PATIENT_FIELDS, CONSULTATION_FIELDS  # noqa: E402
+
+
+class UntunedDB(AyurvedaDB):
+    """AyurvedaDB como antes del ajuste: conexión nueva por llamada, sin PRAGMAs."""
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @contextmanager
+    def _cursor(self, write=False):
+        conn = self._connect()
+        try:
+            if write:
+                with conn:
+                    yield conn
+            else:
+                yield conn
+        finally:
+            conn.close()
+
+
+def fill(db, n_patients, n_consultations):
+    rnd = random.Random(5)
+    conn = sqlite3.connect(db.db_path)
+    with conn:
+        conn.executemany(
+            f"INSERT INTO pacientes ({', '.join(PATIENT_FIELDS)}) VALUES ({', '.join('?' * len(PATIENT_FIELDS))})",
+            [[f"Paciente {i}", "", str(i), "1980-01-01", ""] + [rnd.randint(0, 10) for _ in range(6)] for i in range(n_patients)]
+        )
+        conn.executemany(
+            f"INSERT INTO consultas ({', '.join(CONSULTATION_FIELDS)}) VALUES ({', '.join('?' * len(CONSULTATION_FIELDS))})",
+            [[rnd.randint(1, n_patients), f"2024-{rnd.randint(1, 12):02}-{rnd.randint(1, 28):02}", "Control", "", 0, 0, 0, 5, 5, 5, "", ""]
+             for _ in range(n_consultations)]
+        )
+    conn.close()
+
+
+def time_calls(fn, calls):
+    start = time.perf_counter()
+    for i in range(calls):
+        fn(i)
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def run(db, n_patients, calls):
+    consultation = {f: 0 for f in CONSULTATION_FIELDS}
+    return {
+        "get_patient": time_calls(lambda i: db.get_patient(i % n_patients + 1), calls),
+        "get_patients_page": time_calls(lambda i: db.get_patients_page(), calls),
+        "get_consultations_page": time_calls(lambda i: db.get_consultations_page(i % n_patients + 1), calls),
+        "save_consultation": time_calls(lambda i: db.save_consultation(dict(consultation, paciente_id=i % n_patients + 1, fecha="2025-01-01")), calls // 10 or 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pacientes", type=int, default=2000)
+    parser.add_argument("--consultas", type=int, default=20000)
+    parser.add_argument("--llamadas", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        db = AyurvedaDB(path)
+        fill(db, args.pacientes, args.consultas)
+        db.close()
+        # La base queda en WAL tras abrirla ajustada; la versión sin ajustes vuelve a DELETE
+        before = UntunedDB(path)
+        before.close()  # migrate() usa la conexión ajustada; cerrarla antes de salir de WAL
+        conn = sqlite3.connect(path)
+        conn.execute("PRAGMA journal_mode = DELETE")
+        conn.close()
+        results_before = run(before, args.pacientes, args.llamadas)
+        tuned = AyurvedaDB(path)
+        results_after = run(tuned, args.pacientes, args.llamadas)
+        tuned.close()
+
+    print(f"{'método':<26}{'antes (µs)':>12}{'después (µs)':>14}{'mejora':>9}")
+    for name, before_us in results_before.items():
+        after_us = results_after[name]
+        print(f"{name:<26}{before_us:>12.1f}{after_us:>14.1f}{before_us / after_us:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
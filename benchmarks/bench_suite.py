@@ -0,0 +1,200 @@
+"""Benchmark de la app a escala de clínica, sin cliente de Flet.
+
+Genera datos sintéticos deterministas (1k/10k/100k pacientes), mide cada
+método de AyurvedaDB y la construcción de la vista de cada rama de
+route_change, y guarda los resultados en JSON para comparar ejecuciones:
+
+    python benchmarks/bench_suite.py --escalas 1000 10000 --salida resultados.json
+    python benchmarks/bench_suite.py --escalas 1000 --comparar resultados.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from itertools import islice
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import main as app  # noqa: E402
+from cache import CachedAyurvedaDB  # noqa: E402
+from database import AyurvedaDB  # noqa: E402
+from headless import HeadlessPage  # noqa: E402
+from synthetic import generate_patients, generate_consultations  # noqa: E402
+
+# Consultas por paciente (de media) en los datos sintéticos
+CONSULTATIONS_PER_PATIENT = 4
+CHUNK_SIZE = 5000
+
+
+def build_database(path, n_patients):
+    db = AyurvedaDB(path)
+    patients = generate_patients(n_patients)
+    ids = []
+    while True:
+        chunk = list(islice(patients, CHUNK_SIZE))
+        if not chunk:
+            break
+        with db.transaction():
+            ids += db.insert_patients(chunk)
+    consultations = generate_consultations(ids, CONSULTATIONS_PER_PATIENT)
+    while True:
+        chunk = list(islice(consultations, CHUNK_SIZE))
+        if not chunk:
+            break
+        with db.transaction():
+            db.insert_consultations(chunk)
+    return db, len(ids)
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    return {
+        "n": len(samples),
+        "media_ms": round(statistics.fmean(samples) * 1000, 4),
+        "p50_ms": round(samples[len(samples) // 2] * 1000, 4),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 4),
+    }
+
+
+def measure(fn, repeats):
+    samples = []
+    for i in range(repeats):
+        start = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def bench_db(db, n_patients, repeats):
+    patient = next(generate_patients(1, seed=99))
+    consultation = next(generate_consultations([1], 1, seed=99))
+    pid = lambda i: (i * 7919) % n_patients + 1  # noqa: E731
+    cached = CachedAyurvedaDB(db)
+    return {
+        # El listado completo es caro a gran escala: menos repeticiones
+        "get_patients": measure(lambda i: db.get_patients(), max(3, repeats // 20)),
+        "get_patients_page": measure(lambda i: db.get_patients_page(), repeats),
+        "search_patients": measure(lambda i: db.search_patients("mar gar"), repeats),
+        "get_patient": measure(lambda i: db.get_patient(pid(i)), repeats),
+        "get_consultations_by_patient": measure(lambda i: db.get_consultations_by_patient(pid(i)), repeats),
+        "get_consultations_page": measure(lambda i: db.get_consultations_page(pid(i)), repeats),
+        "get_consultation": measure(lambda i: db.get_consultation(pid(i)), repeats),
+        "search_consultations": measure(lambda i: db.search_consultations("insomnio ashwa"), repeats),
+        "get_monthly_trends": measure(lambda i: db.get_monthly_trends(), repeats),
+        "get_monthly_trends_paciente": measure(lambda i: db.get_monthly_trends(pid(i)), repeats),
+        # Índice de constituciones: la primera llamada lo construye, el resto solo busca
+        "similar_patients": measure(lambda i: cached.similar_patients(pid(i)), repeats),
+        "save_patient": measure(lambda i: db.save_patient(dict(patient)), repeats),
+        "save_consultation": measure(lambda i: db.save_consultation(dict(consultation, paciente_id=pid(i))), repeats),
+    }
+
+
+def close_session(session):
+    """Cierra una sesión de main() con su worker y su base (hilos y conexiones)."""
+    session.close()
+    session.worker.close()
+    session.db.close()
+
+
+def bench_routes(n_patients, repeats):
+    """Tiempo de arranque y de route_change por ruta, con una sesión nueva (sin vistas en caché) por muestra."""
+    routes = {
+        "/": lambda i: "/",
+        "/pacientes": lambda i: "/pacientes",
+        "/nuevo_paciente": lambda i: "/nuevo_paciente",
+        "/editar_paciente/:id": lambda i: f"/editar_paciente/{i % n_patients + 1}",
+        "/paciente/:id": lambda i: f"/paciente/{i % n_patients + 1}",
+        "/consulta/:paciente_id": lambda i: f"/consulta/{i % n_patients + 1}",
+        "/tendencias": lambda i: "/tendencias",
+        "/tendencias/:id": lambda i: f"/tendencias/{i % n_patients + 1}",
+        "/buscar_consultas": lambda i: "/buscar_consultas",
+    }
+    # Arranque completo sin cliente: portada pintada y base abierta y migrada
+    startup = []
+    for i in range(repeats):
+        start = time.perf_counter()
+        session = app.main(HeadlessPage())
+        startup.append(time.perf_counter() - start)
+        close_session(session)
+    results = {"arranque": summarize(startup)}
+    for name, route in routes.items():
+        samples = []
+        for i in range(repeats):
+            page = HeadlessPage()
+            session = app.main(page)
+            start = time.perf_counter()
+            page.go(route(i))
+            samples.append(time.perf_counter() - start)
+            close_session(session)
+        results[name] = summarize(samples)
+    return results
+
+
+def compare(current, previous):
+    """Imprime la variación de la media respecto a una ejecución anterior."""
+    for scale, sections in current["escalas"].items():
+        old_sections = previous.get("escalas", {}).get(scale)
+        if not old_sections:
+            continue
+        print(f"\n== {scale} pacientes: cambio respecto a la ejecución anterior")
+        for section, metrics in sections.items():
+            for name, stats in metrics.items():
+                old = old_sections.get(section, {}).get(name)
+                if old and old["media_ms"]:
+                    change = (stats["media_ms"] / old["media_ms"] - 1) * 100
+                    print(f"{section:>7} {name:<30}{old['media_ms']:>10.3f} -> {stats['media_ms']:<10.3f}{change:+7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--escalas", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeticiones", type=int, default=200)
+    parser.add_argument("--repeticiones-rutas", type=int, default=10)
+    parser.add_argument("--salida", default="bench_resultados.json")
+    parser.add_argument("--comparar", help="JSON de una ejecución anterior")
+    args = parser.parse_args()
+
+    results = {
+        "fecha": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "plataforma": platform.platform(),
+        "escalas": {},
+    }
+    cwd = os.getcwd()
+    for scale in args.escalas:
+        with tempfile.TemporaryDirectory() as tmp:
+            # La app abre su base por nombre relativo: se trabaja dentro del directorio temporal
+            os.chdir(tmp)
+            try:
+                start = time.perf_counter()
+                db, n_patients = build_database(os.path.join(tmp, app.DB_FILE), scale)
+                print(f"{scale} pacientes generados en {time.perf_counter() - start:.1f} s", file=sys.stderr)
+                results["escalas"][str(scale)] = {
+                    "db": bench_db(db, n_patients, args.repeticiones),
+                    "rutas": bench_routes(n_patients, args.repeticiones_rutas),
+                }
+                db.close()
+            finally:
+                os.chdir(cwd)
+
+    with open(args.salida, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    for scale, sections in results["escalas"].items():
+        print(f"\n== {scale} pacientes")
+        for section, metrics in sections.items():
+            for name, stats in metrics.items():
+                print(f"{section:>7} {name:<30}media {stats['media_ms']:>9.3f} ms   p95 {stats['p95_ms']:>9.3f} ms")
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
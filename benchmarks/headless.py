@@ -0,0 +1,111 @@
+"""Página de Flet sin cliente, para ejecutar main(page) en benchmarks y pruebas de carga.
+
+Implementa lo que la app usa de ft.Page: navegación, vistas, overlay,
+pubsub y run_thread/run_task. Las cargas en segundo plano se ejecutan en el
+mismo hilo para que los tiempos medidos las incluyan.
+"""
+import asyncio
+import inspect
+import itertools
+import threading
+import types
+
+import flet as ft
+
+# Sin cliente no hay a quién enviar los cambios: update() de los controles no hace nada
+ft.Control.update = lambda self: None
+
+
+class HeadlessPubSubHub:
+    """Reparto de mensajes entre sesiones sin cliente; los manejadores se llaman en el hilo que envía."""
+
+    def __init__(self):
+        self._topics = {}  # tema -> {session_id: manejador}
+        self._lock = threading.Lock()
+
+    def subscribe_topic(self, session_id, topic, handler):
+        with self._lock:
+            self._topics.setdefault(topic, {})[session_id] = handler
+
+    def unsubscribe_all(self, session_id):
+        with self._lock:
+            for handlers in self._topics.values():
+                handlers.pop(session_id, None)
+
+    def send_others_on_topic(self, session_id, topic, message):
+        with self._lock:
+            handlers = [h for s, h in self._topics.get(topic, {}).items() if s != session_id]
+        for handler in handlers:
+            handler(topic, message)
+
+
+class HeadlessPubSub:
+    """El page.pubsub de una sesión (misma interfaz que el de Flet)."""
+
+    def __init__(self, hub, session_id):
+        self._hub = hub
+        self._session_id = session_id
+
+    def subscribe_topic(self, topic, handler):
+        self._hub.subscribe_topic(self._session_id, topic, handler)
+
+    def unsubscribe_all(self):
+        self._hub.unsubscribe_all(self._session_id)
+
+    def send_others_on_topic(self, topic, message):
+        self._hub.send_others_on_topic(self._session_id, topic, message)
+
+
+_session_ids = itertools.count(1)
+
+
+class HeadlessClientStorage:
+    """El page.client_storage de un navegador, en memoria."""
+
+    def __init__(self):
+        self._data = {}
+
+    def get(self, key):
+        return self._data.get(key)
+
+    def set(self, key, value):
+        self._data[key] = value
+        return True
+
+
+class HeadlessPage:
+    def __init__(self, pubsub_hub=None, client_storage=None):
+        self.session_id = str(next(_session_ids))
+        # Las páginas creadas con el mismo hub se comportan como sesiones de un mismo servidor
+        self.pubsub = HeadlessPubSub(pubsub_hub or HeadlessPubSubHub(), self.session_id)
+        # Con el mismo client_storage, como pestañas de un mismo navegador
+        self.client_storage = client_storage or HeadlessClientStorage()
+        self.views = []
+        self.overlay = []
+        self.route = "/"
+        self.snack_bar = None
+        self.updates = 0
+        self.on_route_change = None
+        self.on_view_pop = None
+
+    def go(self, route):
+        self.route = route
+        if self.on_route_change:
+            result = self.on_route_change(types.SimpleNamespace(route=route))
+            if inspect.iscoroutine(result):
+                asyncio.run(result)
+
+    def update(self, *controls):
+        self.updates += 1
+
+    def run_thread(self, handler, *args, **kwargs):
+        handler(*args, **kwargs)
+
+    def run_task(self, handler, *args, **kwargs):
+        return asyncio.run(handler(*args, **kwargs))
+
+    def open(self, control):
+        pass
+
+    def close(self, control):
+        pass
@@ -0,0 +1,151 @@
+"""Prueba de carga del modo servidor: N sesiones simultáneas sobre una misma base.
+
+Cada sesión es una HeadlessPage con la SharedDatabase de server.py y un
+pubsub común, y corre en su propio hilo un recorrido al azar de recepción
+y terapeutas (listado, búsquedas, fichas, consultas nuevas y ediciones).
+Se mide la latencia de cada paso y, al terminar, se comprueba que ninguna
+caché de sesión guarda una versión de un paciente distinta de la de la base.
+
+    python benchmarks/load_test.py --sesiones 8 --pacientes 10000 --pasos 50
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import main as app  # noqa: E402
+from bench_suite import build_database, summarize  # noqa: E402
+from database import PATIENT_FIELDS, SEARCH_LIMIT  # noqa: E402
+from headless import HeadlessPage, HeadlessPubSubHub  # noqa: E402
+from server import SharedDatabase  # noqa: E402
+from synthetic import generate_consultations  # noqa: E402
+
+# Peso de cada paso en el recorrido de una sesión
+STEPS = {
+    "ficha": 30,
+    "buscar_pacientes": 20,
+    "listado": 15,
+    "nueva_consulta": 15,
+    "buscar_consultas": 10,
+    "editar_paciente": 10,
+}
+
+
+def run_session(number, page, session, n_patients, steps, barrier, samples, edited):
+    rng = random.Random(number)
+    consultation = next(generate_consultations([1], 1, seed=number))
+    barrier.wait()
+    for step in range(steps):
+        name = rng.choices(list(STEPS), weights=list(STEPS.values()))[0]
+        pid = rng.randint(1, n_patients)
+        start = time.perf_counter()
+        if name == "ficha":
+            page.go(f"/paciente/{pid}")
+        elif name == "listado":
+            page.go("/pacientes")
+        elif name == "buscar_pacientes":
+            session.worker.read("search_patients", rng.choice(["mar", "gar", "ana lo", "60"]), SEARCH_LIMIT).result()
+        elif name == "buscar_consultas":
+            session.worker.read("search_consultations", rng.choice(["insomnio", "ashwa", "migra", "dolor"])).result()
+        elif name == "nueva_consulta":
+            # Como el formulario: actualización optimista y espera al commit
+            page.go(f"/consulta/{pid}")
+            data = dict(consultation, paciente_id=pid)
+            future = session.worker.save_consultation(data)
+            session.on_consultation_saved(data, None)
+            future.result()
+        else:
+            patient = session.db.get_patient(pid)
+            data = dict(patient, telefono=f"6{number:02d}{step:05d}")
+            future = session.worker.save_patient(data)
+            session.db.put_patient(data)
+            session.on_patient_saved(data, pid)
+            future.result()
+            edited.add(pid)
+        samples.setdefault(name, []).append(time.perf_counter() - start)
+
+
+def load_test(db_file, n_patients, sessions, steps):
+    shared = SharedDatabase(db_file)
+    hub = HeadlessPubSubHub()
+    pages = [HeadlessPage(hub) for _ in range(sessions)]
+    start = time.perf_counter()
+    apps = [app.main(page, shared) for page in pages]
+    opened = time.perf_counter() - start
+
+    barrier = threading.Barrier(sessions)
+    samples = [{} for _ in range(sessions)]
+    edited = set()
+    threads = [
+        threading.Thread(target=run_session, args=(i, pages[i], apps[i], n_patients, steps, barrier, samples[i], edited))
+        for i in range(sessions)
+    ]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    shared.worker.flush()
+
+    # Cachés obsoletas: pacientes editados cuya copia en alguna sesión no coincide con la base
+    stale = 0
+    for session in apps:
+        for pid in edited:
+            cached = session.db.patients.get(pid)
+            if cached is not None and any(cached.get(f) != v for f, v in shared.db.get_patient(pid).items() if f in PATIENT_FIELDS):
+                stale += 1
+    for session in apps:
+        session.close()
+    shared.close()
+
+    merged = {}
+    for session_samples in samples:
+        for name, values in session_samples.items():
+            merged.setdefault(name, []).extend(values)
+    return {
+        "sesiones": sessions,
+        "pasos": sessions * steps,
+        "abrir_sesiones_ms": round(opened * 1000, 1),
+        "pasos_por_segundo": round(sessions * steps / elapsed, 1),
+        "caches_obsoletas": stale,
+        "latencias": {name: summarize(values) for name, values in sorted(merged.items())},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sesiones", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--pacientes", type=int, default=10000)
+    parser.add_argument("--pasos", type=int, default=50, help="pasos por sesión")
+    parser.add_argument("--salida", help="JSON con los resultados")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = os.path.join(tmp, app.DB_FILE)
+        start = time.perf_counter()
+        db, n_patients = build_database(db_file, args.pacientes)
+        db.close()
+        print(f"{n_patients} pacientes generados en {time.perf_counter() - start:.1f} s", file=sys.stderr)
+        for sessions in args.sesiones:
+            result = load_test(db_file, n_patients, sessions, args.pasos)
+            results.append(result)
+            print(f"\n== {sessions} sesiones: {result['pasos_por_segundo']} pasos/s, "
+                  f"{result['caches_obsoletas']} cachés obsoletas")
+            for name, stats in result["latencias"].items():
+                print(f"{name:<20}n {stats['n']:>5}   media {stats['media_ms']:>9.3f} ms   p95 {stats['p95_ms']:>9.3f} ms")
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
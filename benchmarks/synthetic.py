@@ -0,0 +1,98 @@
+"""Generador determinista de pacientes y consultas realistas para benchmarks.
+
+La misma semilla produce siempre los mismos datos, así que dos ejecuciones
+del benchmark sobre la misma escala son comparables.
+"""
+import datetime
+import random
+
+NOMBRES = [
+    "María", "José", "Lucía", "Andrés", "Sofía", "Martín", "Ana", "Pedro", "Carmen", "Javier",
+    "Laura", "Diego", "Elena", "Pablo", "Isabel", "Hugo", "Valeria", "Tomás", "Paula", "Gabriel",
+]
+APELLIDOS = [
+    "García", "Fernández", "González", "Rodríguez", "López", "Martínez", "Sánchez", "Pérez",
+    "Gómez", "Martín", "Jiménez", "Ruiz", "Hernández", "Díaz", "Moreno", "Muñoz", "Álvarez", "Romero",
+]
+CALLES = ["Av. Libertador", "Calle Mayor", "San Martín", "Belgrano", "Rivadavia", "Los Álamos", "Mitre"]
+MOTIVOS = [
+    "Insomnio", "Ansiedad", "Digestión pesada", "Dolor lumbar", "Migraña", "Fatiga crónica",
+    "Control", "Estrés laboral", "Acidez", "Piel seca", "Retención de líquidos", "Estreñimiento",
+]
+SINTOMAS = [
+    "dificultad para conciliar el sueño", "despertares nocturnos", "hinchazón abdominal",
+    "ardor después de comer", "manos y pies fríos", "irritabilidad", "pesadez por la mañana",
+    "falta de apetito", "sed excesiva", "rigidez articular", "pensamientos acelerados", "letargo",
+]
+TRATAMIENTOS = [
+    "Ashwagandha 500 mg por la noche", "Triphala antes de dormir", "Abhyanga con aceite de sésamo",
+    "Infusión de jengibre y comino", "Pranayama nadi shodhana 10 min", "Dieta pacificadora de Vata",
+    "Dieta pacificadora de Pitta", "Ejercicio matinal para Kapha", "Brahmi por la mañana",
+    "Cenar antes de las 20 h", "Meditación guiada 15 min", "Shatavari con leche tibia",
+]
+NOTAS = [
+    "Antecedentes de hipotiroidismo.", "Practica yoga dos veces por semana.", "Trabajo sedentario.",
+    "Alergia estacional.", "Vegetariano desde hace 5 años.", "Duerme menos de 6 horas.",
+    "Toma café varias veces al día.", "Sin antecedentes relevantes.",
+]
+
+# Proporción de constituciones dominantes (vata, pitta, kapha)
+DOSHA_WEIGHTS = [0.4, 0.35, 0.25]
+
+
+def _constitution(rnd, dominant):
+    """Puntuaciones 0-10 con un dosha dominante y los otros más bajos."""
+    scores = [rnd.randint(2, 6) for _ in range(3)]
+    scores[dominant] = rnd.randint(7, 10)
+    return scores
+
+
+def _text(rnd, pool, n_min, n_max):
+    return ", ".join(rnd.sample(pool, rnd.randint(n_min, n_max))).capitalize()
+
+
+def generate_patients(n, seed=1):
+    """Genera `n` pacientes (diccionarios con los campos de save_patient)."""
+    rnd = random.Random(seed)
+    for i in range(n):
+        dominant = rnd.choices(range(3), DOSHA_WEIGHTS)[0]
+        vata, pitta, kapha = _constitution(rnd, dominant)
+        sattva = rnd.randint(3, 9)
+        rajas = rnd.randint(2, 8)
+        birth = datetime.date(1940, 1, 1) + datetime.timedelta(days=rnd.randint(0, 365 * 65))
+        yield {
+            "nombre": f"{rnd.choice(NOMBRES)} {rnd.choice(APELLIDOS)} {rnd.choice(APELLIDOS)}",
+            "domicilio": f"{rnd.choice(CALLES)} {rnd.randint(1, 4000)}",
+            "telefono": f"11{rnd.randint(10000000, 99999999)}",
+            "fecha_nacimiento": birth.strftime("%Y-%m-%d"),
+            "nota": " ".join(rnd.sample(NOTAS, rnd.randint(1, 3))),
+            "prakruti_vata": vata,
+            "prakruti_pitta": pitta,
+            "prakruti_kapha": kapha,
+            "prakruti_sattva": sattva,
+            "prakruti_rajas": rajas,
+            "prakruti_tamas": max(0, 10 - sattva - rajas // 2),
+        }
+
+
+def generate_consultations(patient_ids, per_patient, seed=2, start=datetime.date(2018, 1, 1)):
+    """Genera, para cada id, `per_patient` consultas de media (entre 1 y el doble)."""
+    rnd = random.Random(seed)
+    for patient_id in patient_ids:
+        day = start + datetime.timedelta(days=rnd.randint(0, 365))
+        for _ in range(rnd.randint(1, per_patient * 2 - 1)):
+            day += datetime.timedelta(days=rnd.randint(7, 60))
+            yield {
+                "paciente_id": patient_id,
+                "fecha": day.strftime("%Y-%m-%d"),
+                "motivo": rnd.choice(MOTIVOS),
+                "sintomas": _text(rnd, SINTOMAS, 1, 3),
+                "vikruti_vata": rnd.randint(0, 8),
+                "vikruti_pitta": rnd.randint(0, 8),
+                "vikruti_kapha": rnd.randint(0, 8),
+                "guna_sattva": rnd.randint(2, 9),
+                "guna_rajas": rnd.randint(2, 9),
+                "guna_tamas": rnd.randint(1, 7),
+                "tratamiento": _text(rnd, TRATAMIENTOS, 1, 4),
+                "detalle": rnd.choice(NOTAS) if rnd.random() < 0.3 else "",
+            }
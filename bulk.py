@@ -0,0 +1,252 @@
+"""Importación y exportación masiva de pacientes y consultas (CSV y JSON Lines).
+
+Uso desde la línea de comandos:
+
+    python bulk.py importar pacientes.csv consultas.jsonl [--db pacientes_v5.db]
+    python bulk.py exportar --pacientes pacientes.csv --consultas consultas.jsonl
+
+Las filas se leen y escriben en streaming y se insertan por bloques, cada uno
+en su transacción, así que la memoria usada no depende del tamaño del archivo.
+Las consultas apuntan a su paciente con `paciente_id` (el id del sistema de
+origen, que se traduce al id que recibió el paciente al importarlo, en la
+misma importación o en una anterior) o con `paciente_nombre`. Las consultas
+de pacientes que no se importaron se omiten: un id de origen nunca se toma
+por un id de la base. El origen de un archivo es la carpeta que lo contiene
+(o el que se indique con --origen): los ids de dos sistemas distintos no se
+mezclan aunque coincidan.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from itertools import islice
+
+from database import AyurvedaDB, PATIENT_FIELDS, CONSULTATION_FIELDS
+
+# Filas por bloque (una transacción y un executemany por bloque)
+CHUNK_SIZE = 5000
+
+# Valor por defecto de las columnas numéricas que lleguen vacías
+NUMERIC_DEFAULTS = {
+    "prakruti_vata": 5, "prakruti_pitta": 5, "prakruti_kapha": 5,
+    "prakruti_sattva": 5, "prakruti_rajas": 5, "prakruti_tamas": 5,
+    "vikruti_vata": 0, "vikruti_pitta": 0, "vikruti_kapha": 0,
+    "guna_sattva": 5, "guna_rajas": 5, "guna_tamas": 5,
+}
+
+
+# --- Lectura y escritura de archivos ---
+def read_rows(path):
+    """Genera las filas de un archivo .csv o .jsonl como diccionarios."""
+    if path.endswith(".csv"):
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            yield from csv.DictReader(f)
+    else:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def write_rows(path, fields, rows):
+    """Escribe `rows` en un archivo .csv o .jsonl. Devuelve cuántas filas escribió."""
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        if path.endswith(".csv"):
+            writer = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+            writer.writeheader()
+            for row in rows:
+                writer.writerow(row)
+                count += 1
+        else:
+            for row in rows:
+                f.write(json.dumps({k: row.get(k) for k in fields}, ensure_ascii=False) + "\n")
+                count += 1
+    return count
+
+
+def is_consultations_file(path):
+    """Distingue un archivo de consultas de uno de pacientes mirando la primera fila."""
+    first = next(read_rows(path), {})
+    return "motivo" in first or "paciente_id" in first or "paciente_nombre" in first
+
+
+def chunks(rows, size):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def clean(row, fields):
+    """Se queda con las columnas conocidas; vacíos a None y numéricos a su valor por defecto."""
+    data = {}
+    for f in fields:
+        value = row.get(f)
+        if value == "":
+            value = None
+        if value is None and f in NUMERIC_DEFAULTS:
+            value = NUMERIC_DEFAULTS[f]
+        data[f] = value
+    return data
+
+
+# --- Importación ---
+class Importer:
+    """Sesión de importación.
+
+    Guarda en la tabla importacion_ids la correspondencia entre el id de
+    origen de cada paciente importado y su nuevo id, por sistema de origen
+    (`source`), para resolver las consultas sin tenerla en memoria, también
+    si llegan en otra importación (pacientes.csv y consultas.csv elegidos por
+    separado). Si un id de origen se vuelve a importar desde el mismo origen,
+    vale el último. `progress(tipo, filas)` se llama tras cada bloque.
+    """
+
+    def __init__(self, db, chunk_size=CHUNK_SIZE, progress=None):
+        self.db = db
+        self.chunk_size = chunk_size
+        self.progress = progress or (lambda kind, count: None)
+        self.skipped = 0
+
+    def import_patients(self, rows, source=""):
+        total = 0
+        for chunk in chunks(rows, self.chunk_size):
+            valid = [r for r in chunk if r.get("nombre")]
+            self.skipped += len(chunk) - len(valid)
+            with self.db.transaction() as conn:
+                ids = self.db.insert_patients([clean(r, PATIENT_FIELDS) for r in valid])
+                conn.executemany(
+                    "INSERT OR REPLACE INTO importacion_ids (origen, externo, id) VALUES (?, ?, ?)",
+                    [(source, str(r["id"]), pid) for r, pid in zip(valid, ids) if r.get("id") not in (None, "")]
+                )
+            total += len(valid)
+            self.progress("pacientes", total)
+        return total
+
+    def import_consultations(self, rows, source=""):
+        total = 0
+        for chunk in chunks(rows, self.chunk_size):
+            with self.db.transaction() as conn:
+                resolved = self._resolve_patients(conn, chunk, source)
+                valid = []
+                for row in chunk:
+                    patient_id = resolved.get(_patient_ref(row))
+                    if patient_id is None:
+                        self.skipped += 1
+                        continue
+                    valid.append(dict(clean(row, CONSULTATION_FIELDS), paciente_id=patient_id))
+                self.db.insert_consultations(valid)
+            total += len(valid)
+            self.progress("consultas", total)
+        return total
+
+    def _resolve_patients(self, conn, chunk, source):
+        """Traduce las referencias a paciente de un bloque a ids de la base (una consulta por tipo).
+
+        Un `paciente_id` solo se resuelve si ese paciente se importó desde el
+        mismo origen: los ids de otro sistema no se corresponden con los de
+        esta base. Los nombres se comparan como COLLATE NOCASE, que solo
+        iguala mayúsculas y minúsculas ASCII (ver _fold).
+        """
+        refs = {_patient_ref(r) for r in chunk} - {None}
+        by_id = [ref[1] for ref in refs if ref[0] == "id"]
+        by_name = [ref[1].decode() for ref in refs if ref[0] == "nombre"]
+        resolved = {}
+        if by_id:
+            marks = ", ".join("?" for _ in by_id)
+            rows = conn.execute(
+                f"SELECT i.externo, i.id FROM importacion_ids i JOIN pacientes p ON p.id = i.id "
+                f"WHERE i.origen = ? AND i.externo IN ({marks})",
+                [source] + by_id
+            )
+            for r in rows:
+                resolved[("id", r[0])] = r[1]
+        if by_name:
+            marks = ", ".join("?" for _ in by_name)
+            rows = conn.execute(
+                f"SELECT nombre, id FROM pacientes WHERE nombre COLLATE NOCASE IN ({marks}) ORDER BY id",
+                by_name
+            )
+            for r in rows:
+                resolved.setdefault(("nombre", _fold(r[0])), r[1])
+        return resolved
+
+
+def _patient_ref(row):
+    if row.get("paciente_id") not in (None, ""):
+        return ("id", str(row["paciente_id"]))
+    if row.get("paciente_nombre"):
+        return ("nombre", _fold(row["paciente_nombre"]))
+    return None
+
+
+def _fold(name):
+    # Como COLLATE NOCASE: bytes.lower() solo cambia las letras ASCII ("Á" no se iguala a "á")
+    return name.encode().lower()
+
+
+def import_files(db, paths, progress=None, source=None):
+    """Importa varios archivos; los de pacientes primero. Devuelve (pacientes, consultas, omitidas).
+
+    Sin `source`, el origen de cada archivo es la carpeta que lo contiene.
+    """
+    patient_files = [p for p in paths if not is_consultations_file(p)]
+    consultation_files = [p for p in paths if p not in patient_files]
+    patients = consultations = 0
+    importer = Importer(db, progress=progress)
+    for path in patient_files:
+        patients += importer.import_patients(read_rows(path), _source(path, source))
+    for path in consultation_files:
+        consultations += importer.import_consultations(read_rows(path), _source(path, source))
+    return patients, consultations, importer.skipped
+
+
+def _source(path, source):
+    return source if source is not None else os.path.dirname(os.path.abspath(path))
+
+
+# --- Exportación ---
+def export_patients(db, path):
+    return write_rows(path, ["id"] + PATIENT_FIELDS, db.iter_patients())
+
+
+def export_consultations(db, path):
+    return write_rows(path, ["id"] + CONSULTATION_FIELDS, db.iter_consultations())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Importa o exporta pacientes y consultas (CSV o JSON Lines).")
+    parser.add_argument("--db", default="pacientes_v5.db", help="archivo de la base de datos")
+    sub = parser.add_subparsers(dest="accion", required=True)
+    p_import = sub.add_parser("importar", help="importa uno o más archivos .csv/.jsonl")
+    p_import.add_argument("archivos", nargs="+")
+    p_import.add_argument("--origen", help="sistema de origen de los ids (por defecto, la carpeta de cada archivo)")
+    p_export = sub.add_parser("exportar", help="exporta a .csv/.jsonl")
+    p_export.add_argument("--pacientes")
+    p_export.add_argument("--consultas")
+    args = parser.parse_args(argv)
+
+    db = AyurvedaDB(args.db)
+    if args.accion == "importar":
+        def progress(kind, count):
+            print(f"\r{kind}: {count}", end="", file=sys.stderr, flush=True)
+
+        for path in args.archivos:
+            if not os.path.exists(path):
+                parser.error(f"no existe el archivo {path}")
+        patients, consultations, skipped = import_files(db, args.archivos, progress, args.origen)
+        print(f"\nImportados {patients} pacientes y {consultations} consultas ({skipped} filas omitidas)", file=sys.stderr)
+    else:
+        if args.pacientes:
+            print(f"Exportados {export_patients(db, args.pacientes)} pacientes", file=sys.stderr)
+        if args.consultas:
+            print(f"Exportadas {export_consultations(db, args.consultas)} consultas", file=sys.stderr)
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+import threading
+from collections import OrderedDict
+
+from database import PAGE_SIZE, PATIENT_FIELDS
+
+# Capacidad por defecto de cada caché
+PATIENT_CACHE_SIZE = 256
+CONSULTATION_PAGE_CACHE_SIZE = 64
+
+
+class LRUCache:
+    """Diccionario acotado que descarta la entrada usada hace más tiempo.
+
+    Si se da `on_evict(clave, valor)`, se llama (fuera del cerrojo) con cada
+    entrada descartada por falta de sitio.
+    """
+
+    def __init__(self, maxsize, on_evict=None):
+        self.maxsize = maxsize
+        self.on_evict = on_evict
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        evicted = []
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                evicted.append(self._data.popitem(last=False))
+        if self.on_evict is not None:
+            for old_key, old_value in evicted:
+                self.on_evict(old_key, old_value)
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def pop_where(self, predicate):
+        """Elimina las claves para las que `predicate(key)` es verdadero."""
+        with self._lock:
+            for key in [k for k in self._data if predicate(k)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+class CachedAyurvedaDB:
+    """Caché de lectura delante de AyurvedaDB.
+
+    Guarda en memoria los pacientes y las páginas de historial ya leídos. Las
+    escrituras pasan a la base y actualizan o invalidan la caché en el acto
+    (write-through), así que las vistas repetidas no vuelven a tocar el disco;
+    las de otras sesiones se aplican con patient_changed() y consultation_added().
+    También mantiene el índice de constituciones de similar_patients(), que se
+    construye la primera vez que se usa. El resto de métodos se delegan sin
+    caché a la base.
+    """
+
+    def __init__(self, db, patient_cache_size=PATIENT_CACHE_SIZE, page_cache_size=CONSULTATION_PAGE_CACHE_SIZE):
+        self.db = db
+        self.patients = LRUCache(patient_cache_size)
+        # Generación de cada paciente, que sube con cada cambio, y de toda la caché (clear);
+        # una lectura solo entra en caché si ninguna cambió mientras se hacía. Las páginas de
+        # historial tienen la suya, que sube con cada consulta nueva del paciente
+        self._generations = {}
+        self._page_generations = {}
+        self._epoch = 0
+        self._generations_lock = threading.Lock()
+        self.consultation_pages = LRUCache(page_cache_size)
+        self._constitutions = None
+        self._constitutions_lock = threading.Lock()
+
+    def __getattr__(self, name):
+        return getattr(self.db, name)
+
+    def get_patient(self, patient_id):
+        patient_id = int(patient_id)
+        patient = self.patients.get(patient_id)
+        if patient is None:
+            generation = self._generation(patient_id)
+            patient = self.db.get_patient(patient_id)
+            if patient is not None:
+                with self._generations_lock:
+                    # Si el paciente cambió durante la lectura, la fila leída puede ser la de antes
+                    if self._generation(patient_id) == generation:
+                        self.patients.put(patient_id, patient)
+        return patient
+
+    def _generation(self, patient_id):
+        return self._epoch, self._generations.get(patient_id, 0)
+
+    def _page_generation(self, patient_id):
+        return self._epoch, self._page_generations.get(patient_id, 0)
+
+    def _set_patient(self, patient_id, patient):
+        """Sustituye (o descarta, con None) la copia en caché y sube la generación del paciente."""
+        with self._generations_lock:
+            self._generations[patient_id] = self._generations.get(patient_id, 0) + 1
+            if patient is None:
+                self.patients.pop(patient_id)
+            else:
+                self.patients.put(patient_id, patient)
+
+    def save_patient(self, data):
+        patient_id = self.db.save_patient(data)
+        self._set_patient(patient_id, dict(data, id=patient_id) if all(f in data for f in PATIENT_FIELDS) else None)
+        self._update_constitution(patient_id, data)
+        return patient_id
+
+    def patient_changed(self, patient_id, data):
+        """Otra sesión guardó el paciente: se descarta la copia en caché (se releerá de la base)."""
+        self.forget_patient(patient_id)
+        self._update_constitution(int(patient_id), data)
+
+    def forget_patient(self, patient_id):
+        """Descarta la copia en caché del paciente, también la de una lectura aún en curso."""
+        self._set_patient(int(patient_id), None)
+
+    def _update_constitution(self, patient_id, data):
+        # Con el cerrojo: si el índice se está construyendo, el paciente se añade después
+        with self._constitutions_lock:
+            if self._constitutions is not None:
+                self._constitutions.update(dict(data, id=patient_id))
+
+    def put_patient(self, patient):
+        """Actualiza la caché con un paciente aún no escrito (actualización optimista)."""
+        self._set_patient(int(patient["id"]), patient)
+
+    def similar_patients(self, patient_id, limit=None):
+        """Pacientes con la constitución más parecida a la de `patient_id`: [(paciente, distancia)]."""
+        from similarity import SIMILAR_LIMIT, ConstitutionIndex  # NumPy solo se carga si se usa
+
+        with self._constitutions_lock:
+            if self._constitutions is None:
+                self._constitutions = ConstitutionIndex.build(self.db)
+        vector = self._constitutions.vector(patient_id)
+        if vector is None:
+            return []
+        neighbours = self._constitutions.nearest(vector, limit or SIMILAR_LIMIT, exclude=patient_id)
+        return [(self.get_patient(pid), distance) for pid, distance in neighbours]
+
+    def get_consultations_page(self, patient_id, before=None, limit=PAGE_SIZE):
+        key = (int(patient_id), before, limit)
+        page = self.consultation_pages.get(key)
+        if page is None:
+            generation = self._page_generation(key[0])
+            page = self.db.get_consultations_page(*key)
+            with self._generations_lock:
+                # Una consulta guardada durante la lectura puede faltar en la página leída
+                if self._page_generation(key[0]) == generation:
+                    self.consultation_pages.put(key, page)
+        return page
+
+    def save_consultation(self, data):
+        consultation_id = self.db.save_consultation(data)
+        self.consultation_added(data["paciente_id"])
+        return consultation_id
+
+    def consultation_added(self, patient_id):
+        """Descarta las páginas de historial en caché del paciente, también las de una lectura aún en curso."""
+        patient_id = int(patient_id)
+        with self._generations_lock:
+            self._page_generations[patient_id] = self._page_generations.get(patient_id, 0) + 1
+            self.consultation_pages.pop_where(lambda key: key[0] == patient_id)
+
+    def clear(self):
+        """Vacía las cachés (p. ej. tras una importación masiva)."""
+        with self._generations_lock:
+            self._epoch += 1
+            self._generations.clear()
+            self._page_generations.clear()
+            self.patients.clear()
+            self.consultation_pages.clear()
+        self._constitutions = None
+
+    def stats(self):
+        """Contadores de aciertos y fallos de cada caché."""
+        return {"patients": self.patients.stats(), "consultation_pages": self.consultation_pages.stats()}
@@ -0,0 +1,1084 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+# Tamaño de página por defecto para los listados paginados
+PAGE_SIZE = 30
+# Máximo de resultados devueltos por la búsqueda de pacientes
+SEARCH_LIMIT = 20
+
+PATIENT_FIELDS = [
+    "nombre", "domicilio", "telefono", "fecha_nacimiento", "nota",
+    "prakruti_vata", "prakruti_pitta", "prakruti_kapha",
+    "prakruti_sattva", "prakruti_rajas", "prakruti_tamas",
+]
+
+# Columnas que muestran el listado y el buscador de pacientes
+PATIENT_SUMMARY_FIELDS = ["id", "nombre", "telefono", "fecha_nacimiento"]
+
+# Vector de constitución de cada paciente
+PRAKRUTI_FIELDS = PATIENT_FIELDS[5:]
+
+CONSULTATION_FIELDS = [
+    "paciente_id", "fecha", "motivo", "sintomas",
+    "vikruti_vata", "vikruti_pitta", "vikruti_kapha",
+    "guna_sattva", "guna_rajas", "guna_tamas",
+    "tratamiento", "detalle",
+]
+
+# Caracteres de síntomas y tratamiento que trae el historial; el texto completo se lee al desplegar
+TEXT_PREVIEW = 160
+
+# Resultados por página de la búsqueda en consultas
+CONSULTATION_SEARCH_LIMIT = 20
+# Coincidencias más recientes que se ordenan por relevancia: bm25 cuesta unos 2 µs por
+# coincidencia y una palabra frecuente aparece en decenas de miles de consultas
+CONSULTATION_RANK_WINDOW = 2000
+# Marcas que rodean las coincidencias en los fragmentos de la búsqueda en consultas
+HIGHLIGHT_START, HIGHLIGHT_END = "\x02", "\x03"
+
+# Tablas cuyos cambios se registran para las copias incrementales y la sincronización
+SYNC_TABLES = ["pacientes", "consultas"]
+# Cambios por bloque al leer el registro de cambios
+SYNC_BATCH = 500
+
+# Valores de cada consulta que se resumen por mes para las tendencias
+TREND_FIELDS = CONSULTATION_FIELDS[4:10]
+
+# Ajustes de SQLite aplicados a cada conexión
+PRAGMAS = [
+    "PRAGMA journal_mode = WAL",      # lectores y escritor no se bloquean entre sí
+    "PRAGMA synchronous = NORMAL",    # en WAL, fsync solo en los checkpoints
+    "PRAGMA cache_size = -8000",      # ~8 MB de caché de páginas
+    "PRAGMA mmap_size = 67108864",    # 64 MB de E/S mapeada en memoria
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA busy_timeout = 5000",
+]
+# Filas por bloque en las migraciones que reescriben tablas grandes
+MIGRATION_CHUNK_SIZE = 2000
+# Bases de versiones anteriores de la app, de la más reciente a la más antigua
+LEGACY_FILES = [f"pacientes_v{n}.db" for n in (4, 3, 2, 1)]
+
+# Filas por bloque al leer columnas para análisis en memoria (iter_columns)
+COLUMN_CHUNK_SIZE = 10000
+
+# Sentencias preparadas que SQLite conserva por conexión
+STATEMENT_CACHE_SIZE = 256
+
+# SQL fijo de las escrituras, para que la caché de sentencias siempre acierte
+_INSERT_PATIENT = "INSERT INTO pacientes ({}) VALUES ({})".format(
+    ", ".join(PATIENT_FIELDS), ", ".join("?" for _ in PATIENT_FIELDS)
+)
+_INSERT_PATIENT_WITH_ID = "INSERT INTO pacientes (id, {}) VALUES (?, {})".format(
+    ", ".join(PATIENT_FIELDS), ", ".join("?" for _ in PATIENT_FIELDS)
+)
+_UPDATE_PATIENT = "UPDATE pacientes SET {} WHERE id = ?".format(
+    ", ".join(f"{f} = ?" for f in PATIENT_FIELDS)
+)
+_INSERT_CONSULTATION = "INSERT INTO consultas ({}) VALUES ({})".format(
+    ", ".join(CONSULTATION_FIELDS), ", ".join("?" for _ in CONSULTATION_FIELDS)
+)
+# Cambios recibidos de otra base (apply_changes): se conserva el id de origen
+_UPSERT_PATIENT = _INSERT_PATIENT_WITH_ID + " ON CONFLICT(id) DO UPDATE SET {}".format(
+    ", ".join(f"{f} = excluded.{f}" for f in PATIENT_FIELDS)
+)
+_INSERT_CONSULTATION_WITH_ID = "INSERT INTO consultas (id, {}) VALUES (?, {}) ON CONFLICT(id) DO NOTHING".format(
+    ", ".join(CONSULTATION_FIELDS), ", ".join("?" for _ in CONSULTATION_FIELDS)
+)
+# Columnas del listado de pacientes y del historial (sin notas ni detalles privados)
+_PATIENT_SUMMARY = ", ".join(PATIENT_SUMMARY_FIELDS)
+_CONSULTATION_SUMMARY = (
+    f"id, paciente_id, fecha, motivo, substr(sintomas, 1, {TEXT_PREVIEW}) AS sintomas, "
+    f"vikruti_vata, vikruti_pitta, vikruti_kapha, substr(tratamiento, 1, {TEXT_PREVIEW}) AS tratamiento"
+)
+# Página de la búsqueda en consultas: sale del propio índice (los fragmentos solo se
+# calculan para las filas devueltas) y después se unen consulta y paciente
+_SEARCH_CONSULTATIONS = (
+    "SELECT c.id, c.paciente_id, c.fecha, c.motivo, p.nombre, r.sintomas, r.tratamiento "
+    "FROM (SELECT rowid, {key} AS orden, snippet(consultas_fts, 1, ?1, ?2, '…', 12) AS sintomas, "
+    "             snippet(consultas_fts, 2, ?1, ?2, '…', 12) AS tratamiento "
+    "      FROM consultas_fts WHERE consultas_fts MATCH ?3 AND {where} "
+    "      ORDER BY {order} LIMIT ?5 OFFSET ?6) r "
+    "JOIN consultas c ON c.id = r.rowid "
+    "JOIN pacientes p ON p.id = c.paciente_id "
+    "ORDER BY r.orden, r.rowid DESC"
+)
+# La fecha es texto libre: solo las que empiezan por un mes AAAA-MM válido entran en las tendencias
+_VALID_MONTH = "({col} GLOB '[0-9][0-9][0-9][0-9]-0[1-9]*' OR {col} GLOB '[0-9][0-9][0-9][0-9]-1[0-2]*')"
+# Suman a los resúmenes mensuales las consultas con id en (?, ?]; las que no tienen fecha válida no cuentan
+_ROLLUP_SELECT = "SELECT {{keys}}, COUNT(*), {} FROM consultas WHERE id > ? AND id <= ? AND {} GROUP BY {{keys}}".format(
+    ", ".join(f"TOTAL({f})" for f in TREND_FIELDS), _VALID_MONTH.format(col="fecha")
+)
+_ROLLUP_UPSERT = "ON CONFLICT({{conflict}}) DO UPDATE SET n = n + excluded.n, {}".format(
+    ", ".join(f"{f} = {f} + excluded.{f}" for f in TREND_FIELDS)
+)
+_UPDATE_CLINIC_TREND = "INSERT INTO tendencia_mensual (mes, n, {}) {} {}".format(
+    ", ".join(TREND_FIELDS),
+    _ROLLUP_SELECT.format(keys="substr(fecha, 1, 7)"),
+    _ROLLUP_UPSERT.format(conflict="mes"),
+)
+_UPDATE_PATIENT_TREND = "INSERT INTO tendencia_paciente_mensual (paciente_id, mes, n, {}) {} {}".format(
+    ", ".join(TREND_FIELDS),
+    _ROLLUP_SELECT.format(keys="paciente_id, substr(fecha, 1, 7)"),
+    _ROLLUP_UPSERT.format(conflict="paciente_id, mes"),
+)
+
+
+class SyncConflict(Exception):
+    """Los cambios recibidos de otra base chocan con registros creados o editados en esta."""
+
+
+class AyurvedaDB:
+    """Acceso a la base SQLite de pacientes y consultas."""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        # Una conexión persistente por hilo (sqlite3 no comparte bien conexiones entre hilos)
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        # tracer(sql, segundos, filas): si se asigna, se llama tras cada consulta (ver perf.py)
+        self.tracer = None
+        self.migrate()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE)
+        conn.row_factory = sqlite3.Row
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def _thread_conn(self):
+        """Conexión de larga duración del hilo actual; se abre la primera vez."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def _cursor(self, write=False):
+        """Conexión para una operación.
+
+        Dentro de transaction() no hace commit; fuera, si `write`, hace commit al final.
+        """
+        conn = self._thread_conn()
+        traced = _TracedConnection(conn, self.tracer) if self.tracer else conn
+        if write and not conn.in_transaction:
+            with conn:
+                yield traced
+        else:
+            yield traced
+
+    @contextmanager
+    def transaction(self):
+        """Agrupa varias escrituras del hilo actual en una sola transacción."""
+        conn = self._thread_conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            yield _TracedConnection(conn, self.tracer) if self.tracer else conn
+
+    def close(self):
+        """Cierra las conexiones abiertas por todos los hilos."""
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+    # --- Migraciones ---
+    def migrate(self):
+        """Aplica en orden, sobre la misma base, las migraciones pendientes.
+
+        La versión del esquema se guarda en PRAGMA user_version. Cada paso de una
+        migración (run_once() o un bloque de run_in_chunks()) se confirma junto con
+        su avance en migracion_progreso; si la app se cierra a medias, incluso
+        justo antes de subir la versión, la migración continúa en el siguiente
+        arranque sin repetir lo ya hecho. El avance se borra en la misma
+        transacción que sube la versión.
+        """
+        with self.transaction() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS migracion_progreso (clave TEXT PRIMARY KEY, ultimo_id INTEGER NOT NULL)"
+            )
+        with self._cursor() as conn:
+            current = conn.execute("PRAGMA user_version").fetchone()[0]
+        for version, description, migration in MIGRATIONS:
+            if version <= current:
+                continue
+            migration(self)
+            with self.transaction() as conn:
+                conn.execute(f"PRAGMA user_version = {version}")
+                conn.execute("DELETE FROM migracion_progreso")
+
+    def schema_version(self):
+        with self._cursor() as conn:
+            return conn.execute("PRAGMA user_version").fetchone()[0]
+
+    def run_in_chunks(self, key, select_sql, apply, chunk_size=MIGRATION_CHUNK_SIZE):
+        """Recorre filas por id en bloques; cada bloque se confirma junto con su avance.
+
+        `select_sql` recibe (último_id, tamaño) y debe devolver filas con `id`
+        ordenadas por id; `apply(conn, filas)` procesa cada bloque. El avance se
+        guarda con la clave `key` para poder reanudar; se conserva al terminar,
+        hasta que migrate() sube la versión.
+        """
+        with self._cursor() as conn:
+            row = conn.execute("SELECT ultimo_id FROM migracion_progreso WHERE clave = ?", (key,)).fetchone()
+        last_id = row[0] if row else 0
+        while True:
+            with self.transaction() as conn:
+                rows = conn.execute(select_sql, (last_id, chunk_size)).fetchall()
+                if not rows:
+                    return
+                apply(conn, rows)
+                last_id = rows[-1]["id"]
+                conn.execute(
+                    "INSERT OR REPLACE INTO migracion_progreso (clave, ultimo_id) VALUES (?, ?)", (key, last_id)
+                )
+
+    def run_once(self, key, apply):
+        """Ejecuta `apply(conn)` en una transacción que también anota `key` como hecha.
+
+        Si `key` ya está anotada (la app se cerró antes de subir la versión) no hace nada.
+        """
+        with self.transaction() as conn:
+            if conn.execute("SELECT 1 FROM migracion_progreso WHERE clave = ?", (key,)).fetchone():
+                return
+            apply(conn)
+            conn.execute("INSERT INTO migracion_progreso (clave, ultimo_id) VALUES (?, 0)", (key,))
+
+    def import_legacy_databases(self, folder):
+        """Importa una sola vez los datos de las bases antiguas (pacientes_v1..v4.db).
+
+        Solo se copian los datos de la más reciente que exista, porque cada
+        versión se creó a partir de la anterior; las demás se marcan como vistas.
+        Los pacientes (mismo nombre y teléfono) y consultas ya presentes no se
+        duplican. Devuelve el nombre del archivo importado o None.
+        """
+        with self._cursor() as conn:
+            done = {r[0] for r in conn.execute("SELECT archivo FROM importaciones_legado")}
+        pending = [f for f in LEGACY_FILES if f not in done and os.path.exists(os.path.join(folder, f))]
+        if not pending:
+            return None
+
+        newest = pending[0]
+        conn = self._thread_conn()
+        conn.execute("ATTACH DATABASE ? AS legado", (os.path.join(folder, newest),))
+        try:
+            with self.transaction():
+                self._copy_legacy(conn)
+                conn.executemany(
+                    "INSERT INTO importaciones_legado (archivo, fecha) VALUES (?, datetime('now'))",
+                    [(f,) for f in pending]
+                )
+        finally:
+            conn.execute("DETACH DATABASE legado")
+        return newest
+
+    def _copy_legacy(self, conn):
+        def columns(schema, table):
+            return [r["name"] for r in conn.execute(f"PRAGMA {schema}.table_info({table})")]
+
+        legacy_tables = {r[0] for r in conn.execute("SELECT name FROM legado.sqlite_master WHERE type = 'table'")}
+        if "pacientes" not in legacy_tables:
+            return
+        # Un paciente antiguo equivale a uno actual con el mismo nombre y teléfono
+        same_patient = (
+            "p.nombre = lp.nombre COLLATE NOCASE AND IFNULL(p.telefono, '') = IFNULL(lp.telefono, '')"
+        )
+
+        # Pacientes: solo las columnas que existan en las dos bases
+        first_new_id = conn.execute("SELECT IFNULL(MAX(id), 0) + 1 FROM main.pacientes").fetchone()[0]
+        cols = [c for c in PATIENT_FIELDS if c in columns("legado", "pacientes")]
+        conn.execute(
+            f"INSERT INTO main.pacientes ({', '.join(cols)}) "
+            f"SELECT {', '.join('lp.' + c for c in cols)} FROM legado.pacientes lp "
+            f"WHERE NOT EXISTS (SELECT 1 FROM main.pacientes p WHERE {same_patient}) ORDER BY lp.id"
+        )
+        new_rows = conn.execute(
+            "SELECT id, nombre, telefono FROM main.pacientes WHERE id >= ?", (first_new_id,)
+        ).fetchall()
+        conn.executemany(
+            "INSERT INTO pacientes_fts (rowid, nombre, telefono) VALUES (?, ?, ?)",
+            [(r["id"], r["nombre"], _digits(r["telefono"])) for r in new_rows]
+        )
+        self._log_changes(conn, "pacientes", first_new_id - 1, new_rows[-1]["id"] if new_rows else 0)
+
+        # Consultas: se enlazan con el paciente equivalente de la base actual
+        if "consultas" not in legacy_tables:
+            return
+        cols = [c for c in CONSULTATION_FIELDS if c != "paciente_id" and c in columns("legado", "consultas")]
+        last_id = self._last_consultation_id(conn)
+        conn.execute(
+            f"INSERT INTO main.consultas (paciente_id, {', '.join(cols)}) "
+            f"SELECT p.id, {', '.join('lc.' + c for c in cols)} FROM legado.consultas lc "
+            f"JOIN legado.pacientes lp ON lp.id = lc.paciente_id "
+            f"JOIN main.pacientes p ON p.id = ("
+            f"    SELECT MIN(p.id) FROM main.pacientes p WHERE {same_patient}"
+            f") WHERE NOT EXISTS (SELECT 1 FROM main.consultas c WHERE c.paciente_id = p.id "
+            f"    AND IFNULL(c.fecha, '') = IFNULL(lc.fecha, '') AND IFNULL(c.motivo, '') = IFNULL(lc.motivo, '')) "
+            f"ORDER BY lc.id"
+        )
+        self._index_consultations(conn, last_id, self._last_consultation_id(conn))
+
+    def _iter_table(self, table, chunk_size):
+        # Paginación por id con una consulta por bloque: no deja cursores abiertos entre bloques
+        last_id = 0
+        while True:
+            with self._cursor() as conn:
+                rows = conn.execute(
+                    f"SELECT * FROM {table} WHERE id > ? ORDER BY id LIMIT ?", (last_id, chunk_size)
+                ).fetchall()
+            for r in rows:
+                yield dict(r)
+            if len(rows) < chunk_size:
+                return
+            last_id = rows[-1]["id"]
+
+    def iter_columns(self, table, columns, chunk_size=COLUMN_CHUNK_SIZE):
+        """Recorre `table` por id en bloques de filas (id, *columns), sin crear diccionarios.
+
+        Pensado para cargar columnas numéricas en arrays de NumPy bloque a bloque.
+        """
+        sql = f"SELECT id, {', '.join(columns)} FROM {table} WHERE id > ? ORDER BY id LIMIT ?"
+        last_id = 0
+        while True:
+            with self._cursor() as conn:
+                rows = conn.execute(sql, (last_id, chunk_size)).fetchall()
+            if rows:
+                yield rows
+            if len(rows) < chunk_size:
+                return
+            last_id = rows[-1][0]
+
+    # --- Pacientes ---
+    def get_patients(self):
+        """Todos los pacientes (solo PATIENT_SUMMARY_FIELDS), ordenados por nombre."""
+        with self._cursor() as conn:
+            rows = conn.execute(f"SELECT {_PATIENT_SUMMARY} FROM pacientes ORDER BY nombre COLLATE NOCASE, id").fetchall()
+        return [dict(r) for r in rows]
+
+    def get_patients_page(self, after=None, limit=PAGE_SIZE):
+        """Página de pacientes ordenada por nombre.
+
+        Paginación por clave (keyset): `after` es la tupla (nombre, id) del último
+        paciente de la página anterior, o None para la primera. Devuelve
+        (pacientes, cursor_siguiente); el cursor es None cuando no hay más. Cada
+        paciente trae solo PATIENT_SUMMARY_FIELDS; la ficha completa, get_patient().
+        """
+        with self._cursor() as conn:
+            if after is None:
+                rows = conn.execute(
+                    f"SELECT {_PATIENT_SUMMARY} FROM pacientes ORDER BY nombre COLLATE NOCASE, id LIMIT ?",
+                    (limit + 1,)
+                ).fetchall()
+            else:
+                nombre, pid = after
+                rows = conn.execute(
+                    f"SELECT {_PATIENT_SUMMARY} FROM pacientes "
+                    "WHERE nombre COLLATE NOCASE >= ? AND (nombre COLLATE NOCASE > ? OR id > ?) "
+                    "ORDER BY nombre COLLATE NOCASE, id LIMIT ?",
+                    (nombre, nombre, pid, limit + 1)
+                ).fetchall()
+
+        patients = [dict(r) for r in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = patients[-1]
+            next_cursor = (last["nombre"], last["id"])
+        return patients, next_cursor
+
+    def get_patient(self, patient_id):
+        with self._cursor() as conn:
+            row = conn.execute("SELECT * FROM pacientes WHERE id = ?", (patient_id,)).fetchone()
+        return dict(row) if row else None
+
+    def save_patient(self, data):
+        """Inserta o actualiza (si data['id'] existe) un paciente. Devuelve su id."""
+        values = [data.get(f) for f in PATIENT_FIELDS]
+        with self._cursor(write=True) as conn:
+            if data.get("id"):
+                conn.execute(_UPDATE_PATIENT, values + [data["id"]])
+                patient_id = int(data["id"])
+            else:
+                cur = conn.execute(_INSERT_PATIENT, values)
+                patient_id = cur.lastrowid
+            # Mantener sincronizado el índice de búsqueda
+            conn.execute("DELETE FROM pacientes_fts WHERE rowid = ?", (patient_id,))
+            conn.execute(
+                "INSERT INTO pacientes_fts (rowid, nombre, telefono) VALUES (?, ?, ?)",
+                (patient_id, data.get("nombre"), _digits(data.get("telefono")))
+            )
+            self._log_changes(conn, "pacientes", patient_id - 1, patient_id)
+        return patient_id
+
+    def insert_patients(self, rows):
+        """Inserta muchos pacientes de una vez (importación). Devuelve sus ids, en orden.
+
+        Los ids se asignan aquí para poder mantener el índice de búsqueda con
+        executemany; debe llamarse dentro de transaction() para que nadie más
+        inserte entre medias.
+        """
+        with self._cursor(write=True) as conn:
+            first_id = conn.execute(
+                "SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'pacientes'), 0), "
+                "COALESCE((SELECT MAX(id) FROM pacientes), 0)) + 1"
+            ).fetchone()[0]
+            ids = list(range(first_id, first_id + len(rows)))
+            conn.executemany(
+                _INSERT_PATIENT_WITH_ID,
+                [[pid] + [r.get(f) for f in PATIENT_FIELDS] for pid, r in zip(ids, rows)]
+            )
+            conn.executemany(
+                "INSERT INTO pacientes_fts (rowid, nombre, telefono) VALUES (?, ?, ?)",
+                [(pid, r.get("nombre"), _digits(r.get("telefono"))) for pid, r in zip(ids, rows)]
+            )
+            self._log_changes(conn, "pacientes", first_id - 1, first_id + len(rows) - 1)
+        return ids
+
+    def iter_patients(self, chunk_size=PAGE_SIZE * 100):
+        """Recorre todos los pacientes por id sin cargarlos todos en memoria."""
+        yield from self._iter_table("pacientes", chunk_size)
+
+    def search_patients(self, text, limit=SEARCH_LIMIT):
+        """Busca pacientes cuyo nombre o teléfono empiece por cada palabra de `text` (PATIENT_SUMMARY_FIELDS).
+
+        Devuelve los `limit` primeros por nombre, como el listado. Un teléfono
+        escrito por grupos ("55 12 34") se busca como una sola palabra, igual
+        que se indexa (ver _digits).
+        """
+        query = _prefix_query(_PHONE_GROUPS.sub("", text or ""))
+        if not query:
+            return []
+        with self._cursor() as conn:
+            rows = conn.execute(
+                # Se ordenan todas las coincidencias antes de cortar: una palabra corta coincide
+                # con miles de pacientes y los `limit` primeros del índice serían los más antiguos
+                f"SELECT {_PATIENT_SUMMARY} FROM pacientes WHERE id IN ("
+                "    SELECT rowid FROM pacientes_fts WHERE pacientes_fts MATCH ?"
+                ") ORDER BY nombre COLLATE NOCASE, id LIMIT ?",
+                (query, limit)
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    # --- Consultas ---
+    def insert_consultations(self, rows):
+        """Inserta muchas consultas de una vez (importación). Devuelve cuántas."""
+        with self._cursor(write=True) as conn:
+            last_id = self._last_consultation_id(conn)
+            conn.executemany(_INSERT_CONSULTATION, [[r.get(f) for f in CONSULTATION_FIELDS] for r in rows])
+            self._index_consultations(conn, last_id, self._last_consultation_id(conn))
+        return len(rows)
+
+    def iter_consultations(self, chunk_size=PAGE_SIZE * 100):
+        """Recorre todas las consultas por id sin cargarlas todas en memoria."""
+        yield from self._iter_table("consultas", chunk_size)
+
+    def get_consultations_by_patient(self, patient_id):
+        """Historial completo de un paciente, con los textos largos recortados (ver get_consultation)."""
+        with self._cursor() as conn:
+            rows = conn.execute(
+                f"SELECT {_CONSULTATION_SUMMARY} FROM consultas WHERE paciente_id = ? ORDER BY fecha DESC NULLS LAST, id DESC",
+                (patient_id,)
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def get_consultations_page(self, patient_id, before=None, limit=PAGE_SIZE):
+        """Página del historial de un paciente, de la consulta más reciente a la más antigua.
+
+        `before` es la tupla (fecha, id) de la última consulta de la página anterior,
+        o None para la primera. Devuelve (consultas, cursor_siguiente); el cursor es
+        None cuando no hay más. Las consultas sin fecha van al final. Síntomas y
+        tratamiento vienen recortados a TEXT_PREVIEW caracteres y sin gunas ni
+        detalle: la consulta completa se lee con get_consultation() al desplegarla.
+        """
+        with self._cursor() as conn:
+            if before is None:
+                rows = conn.execute(
+                    f"SELECT {_CONSULTATION_SUMMARY} FROM consultas WHERE paciente_id = ? "
+                    "ORDER BY fecha DESC NULLS LAST, id DESC LIMIT ?",
+                    (patient_id, limit + 1)
+                ).fetchall()
+            elif before[0] is None:
+                # La página anterior acabó entre las consultas sin fecha: solo quedan esas
+                rows = conn.execute(
+                    f"SELECT {_CONSULTATION_SUMMARY} FROM consultas "
+                    "WHERE paciente_id = ? AND fecha IS NULL AND id < ? "
+                    "ORDER BY fecha DESC NULLS LAST, id DESC LIMIT ?",
+                    (patient_id, before[1], limit + 1)
+                ).fetchall()
+            else:
+                fecha, cid = before
+                rows = conn.execute(
+                    f"SELECT {_CONSULTATION_SUMMARY} FROM consultas "
+                    "WHERE paciente_id = ?1 AND (fecha < ?2 OR (fecha = ?2 AND id < ?3) OR fecha IS NULL) "
+                    "ORDER BY fecha DESC NULLS LAST, id DESC LIMIT ?4",
+                    (patient_id, fecha, cid, limit + 1)
+                ).fetchall()
+
+        consultations = [dict(r) for r in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = consultations[-1]
+            next_cursor = (last["fecha"], last["id"])
+        return consultations, next_cursor
+
+    def get_consultation(self, consultation_id):
+        with self._cursor() as conn:
+            row = conn.execute("SELECT * FROM consultas WHERE id = ?", (consultation_id,)).fetchone()
+        return dict(row) if row else None
+
+    def save_consultation(self, data):
+        values = [data.get(f) for f in CONSULTATION_FIELDS]
+        with self._cursor(write=True) as conn:
+            cur = conn.execute(_INSERT_CONSULTATION, values)
+            consultation_id = cur.lastrowid
+            self._index_consultations(conn, consultation_id - 1, consultation_id)
+        return consultation_id
+
+    def search_consultations(self, text, offset=0, limit=CONSULTATION_SEARCH_LIMIT):
+        """Consultas cuyo motivo, síntomas o tratamiento contienen cada palabra de `text` (por prefijo).
+
+        Las CONSULTATION_RANK_WINDOW coincidencias más recientes van primero,
+        ordenadas por relevancia (bm25, con más peso el motivo); las más
+        antiguas siguen después, de la más reciente a la más antigua, sin
+        puntuar. Cada resultado trae el nombre del paciente y un fragmento de
+        síntomas y otro de tratamiento con las coincidencias entre
+        HIGHLIGHT_START y HIGHLIGHT_END. Devuelve (resultados, offset_siguiente);
+        el offset es None cuando no hay más.
+        """
+        # Las palabras de una letra casan con casi todo el vocabulario: no se buscan
+        query = _prefix_query(text, min_length=2)
+        if not query:
+            return [], None
+        with self._cursor() as conn:
+            # Recorrer las coincidencias por rowid es barato; solo se puntúan las de la ventana
+            window_start, window_size = conn.execute(
+                "SELECT IFNULL(MIN(rowid), 0), COUNT(*) FROM (SELECT rowid FROM consultas_fts "
+                "WHERE consultas_fts MATCH ? ORDER BY rowid DESC LIMIT ?)",
+                (query, CONSULTATION_RANK_WINDOW)
+            ).fetchone()
+            rows = []
+            if offset < window_size:
+                rows = conn.execute(
+                    _SEARCH_CONSULTATIONS.format(where="rowid >= ?4", key="rank", order="rank, rowid DESC"),
+                    (HIGHLIGHT_START, HIGHLIGHT_END, query, window_start, limit + 1, offset)
+                ).fetchall()
+            if len(rows) <= limit and window_size == CONSULTATION_RANK_WINDOW:
+                # Agotada la ventana, la búsqueda sigue por las coincidencias anteriores a ella
+                rows += conn.execute(
+                    _SEARCH_CONSULTATIONS.format(where="rowid < ?4", key="-rowid", order="rowid DESC"),
+                    (HIGHLIGHT_START, HIGHLIGHT_END, query, window_start, limit + 1 - len(rows), max(0, offset - window_size))
+                ).fetchall()
+        results = [dict(r) for r in rows[:limit]]
+        return results, offset + limit if len(rows) > limit else None
+
+    # --- Índices de consultas (búsqueda y tendencias) ---
+    def _last_consultation_id(self, conn):
+        return conn.execute("SELECT IFNULL(MAX(id), 0) FROM consultas").fetchone()[0]
+
+    def _index_consultations(self, conn, after_id, last_id):
+        """Añade a la búsqueda, las tendencias y el registro de cambios las consultas con id en (after_id, last_id]."""
+        self._update_consultation_search(conn, after_id, last_id)
+        self._update_trends(conn, after_id, last_id)
+        self._log_changes(conn, "consultas", after_id, last_id)
+
+    def _update_consultation_search(self, conn, after_id, last_id):
+        if last_id > after_id:
+            conn.execute(
+                "INSERT INTO consultas_fts (rowid, motivo, sintomas, tratamiento) "
+                "SELECT id, motivo, sintomas, tratamiento FROM consultas WHERE id > ? AND id <= ?",
+                (after_id, last_id)
+            )
+
+    def _update_trends(self, conn, after_id, last_id):
+        """Suma a los resúmenes mensuales las consultas con id en (after_id, last_id]."""
+        if last_id > after_id:
+            conn.execute(_UPDATE_CLINIC_TREND, (after_id, last_id))
+            conn.execute(_UPDATE_PATIENT_TREND, (after_id, last_id))
+
+    def get_monthly_trends(self, patient_id=None):
+        """Resumen por mes de la clínica o de un paciente: filas (mes, n, suma de cada TREND_FIELDS)."""
+        cols = ", ".join(["mes", "n"] + TREND_FIELDS)
+        with self._cursor() as conn:
+            if patient_id is None:
+                return conn.execute(f"SELECT {cols} FROM tendencia_mensual ORDER BY mes").fetchall()
+            return conn.execute(
+                f"SELECT {cols} FROM tendencia_paciente_mensual WHERE paciente_id = ? ORDER BY mes",
+                (int(patient_id),)
+            ).fetchall()
+
+    # --- Borradores de formularios ---
+    def save_drafts(self, device, drafts):
+        """Guarda varios borradores {ruta: campos} del dispositivo `device`; los que valen None se borran."""
+        with self._cursor(write=True) as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO borradores (dispositivo, ruta, datos, actualizado) VALUES (?, ?, ?, datetime('now'))",
+                [(device, route, json.dumps(data, ensure_ascii=False)) for route, data in drafts.items() if data is not None]
+            )
+            conn.executemany(
+                "DELETE FROM borradores WHERE dispositivo = ? AND ruta = ?",
+                [(device, route) for route, data in drafts.items() if data is None]
+            )
+
+    def get_draft(self, device, route):
+        """Campos del borrador de `route` guardado por el dispositivo `device`, o None."""
+        with self._cursor() as conn:
+            row = conn.execute(
+                "SELECT datos FROM borradores WHERE dispositivo = ? AND ruta = ?", (device, route)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    # --- Registro de cambios (copias incrementales y sincronización) ---
+    def _log_changes(self, conn, table, after_id, last_id):
+        """Anota como cambiadas las filas de `table` con id en (after_id, last_id].
+
+        Cada fila tiene una sola entrada: un cambio nuevo la sustituye con un
+        seq mayor, así el registro no crece con las ediciones repetidas.
+        """
+        if last_id > after_id:
+            conn.execute(
+                f"INSERT OR REPLACE INTO cambios (tabla, fila_id) SELECT ?, id FROM {table} WHERE id > ? AND id <= ?",
+                (table, after_id, last_id)
+            )
+
+    def changes_since(self, cursor=0, limit=SYNC_BATCH):
+        """Filas cambiadas después del seq `cursor`, en el orden en que cambiaron.
+
+        Devuelve (cambios, cursor_siguiente). Cada cambio es un diccionario con
+        `tabla` y `datos` (la fila completa); el cursor siguiente es el seq del
+        último cambio devuelto, o `cursor` si no hay más.
+        """
+        with self._cursor() as conn:
+            log = conn.execute(
+                "SELECT seq, tabla, fila_id FROM cambios WHERE seq > ? ORDER BY seq LIMIT ?", (cursor, limit)
+            ).fetchall()
+            rows = {}
+            for table in SYNC_TABLES:
+                ids = [r["fila_id"] for r in log if r["tabla"] == table]
+                if ids:
+                    found = conn.execute(
+                        f"SELECT * FROM {table} WHERE id IN ({', '.join('?' for _ in ids)})", ids
+                    ).fetchall()
+                    rows.update(((table, r["id"]), dict(r)) for r in found)
+        changes = [
+            {"tabla": r["tabla"], "datos": rows[(r["tabla"], r["fila_id"])]}
+            for r in log if (r["tabla"], r["fila_id"]) in rows
+        ]
+        return changes, log[-1]["seq"] if log else cursor
+
+    def apply_changes(self, changes, log=True):
+        """Aplica en esta base los cambios de changes_since() de otra, conservando los ids.
+
+        Los pacientes se insertan o actualizan; las consultas (que no se editan)
+        se insertan y se indexan para la búsqueda y las tendencias. Pensado
+        para réplicas que no crean registros propios: si una consulta recibida
+        con id ya usado aquí no es idéntica a la de esta base, o si sin `log`
+        llega un paciente que esta base cambió por su cuenta, lanza SyncConflict
+        sin aplicar nada. Lo recibido que ya está igual se omite. Con `log` los
+        cambios entran también en el registro de esta base (para servirlos a su
+        vez). Devuelve cuántas filas se aplicaron.
+        """
+        patients = [c["datos"] for c in changes if c["tabla"] == "pacientes"]
+        consultations = [c["datos"] for c in changes if c["tabla"] == "consultas"]
+        with self._cursor(write=True) as conn:
+            last_id = self._last_consultation_id(conn)
+            self._check_consultation_conflicts(conn, [c for c in consultations if c["id"] <= last_id])
+            if not log:
+                # En una réplica lo recibido no se registra: lo que está en el registro se cambió aquí
+                self._check_patient_conflicts(conn, patients)
+            if patients:
+                conn.executemany(_UPSERT_PATIENT, [[p["id"]] + [p.get(f) for f in PATIENT_FIELDS] for p in patients])
+                conn.executemany("DELETE FROM pacientes_fts WHERE rowid = ?", [(p["id"],) for p in patients])
+                conn.executemany(
+                    "INSERT INTO pacientes_fts (rowid, nombre, telefono) VALUES (?, ?, ?)",
+                    [(p["id"], p.get("nombre"), _digits(p.get("telefono"))) for p in patients]
+                )
+                if log:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO cambios (tabla, fila_id) VALUES ('pacientes', ?)",
+                        [(p["id"],) for p in patients]
+                    )
+            new = sorted((c for c in consultations if c["id"] > last_id), key=lambda c: c["id"])
+            if new:
+                conn.executemany(
+                    _INSERT_CONSULTATION_WITH_ID, [[c["id"]] + [c.get(f) for f in CONSULTATION_FIELDS] for c in new]
+                )
+                self._update_consultation_search(conn, last_id, new[-1]["id"])
+                self._update_trends(conn, last_id, new[-1]["id"])
+                if log:
+                    self._log_changes(conn, "consultas", last_id, new[-1]["id"])
+        return len(patients) + len(new)
+
+    def _check_consultation_conflicts(self, conn, consultations):
+        """Las consultas recibidas con un id ya usado aquí deben ser la misma consulta (un reenvío)."""
+        if not consultations:
+            return
+        ids = [c["id"] for c in consultations]
+        local = {
+            r["id"]: r for r in conn.execute(f"SELECT * FROM consultas WHERE id IN ({', '.join('?' for _ in ids)})", ids)
+        }
+        for c in consultations:
+            row = local.get(c["id"])
+            if row is None or any(row[f] != c.get(f) for f in CONSULTATION_FIELDS):
+                raise SyncConflict(f"La consulta {c['id']} recibida no coincide con la de esta base")
+
+    def _check_patient_conflicts(self, conn, patients):
+        """Un paciente recibido no puede pisar uno creado o editado en esta base."""
+        if not patients:
+            return
+        ids = [p["id"] for p in patients]
+        local = {
+            r["id"]: r for r in conn.execute(
+                f"SELECT p.* FROM pacientes p JOIN cambios c ON c.tabla = 'pacientes' AND c.fila_id = p.id "
+                f"WHERE p.id IN ({', '.join('?' for _ in ids)})",
+                ids
+            )
+        }
+        for p in patients:
+            row = local.get(p["id"])
+            if row is not None and any(row[f] != p.get(f) for f in PATIENT_FIELDS):
+                raise SyncConflict(f"El paciente {p['id']} recibido también se cambió en esta base")
+
+    def get_sync_cursor(self, key):
+        """Cursor guardado con la clave `key` (None si no hay)."""
+        with self._cursor() as conn:
+            row = conn.execute("SELECT cursor FROM sincronizacion WHERE clave = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_sync_cursor(self, key, cursor):
+        with self._cursor(write=True) as conn:
+            conn.execute("INSERT OR REPLACE INTO sincronizacion (clave, cursor) VALUES (?, ?)", (key, cursor))
+
+    def backup_to(self, target, pages, progress=None):
+        """Copia la base entera en la conexión `target` con la API de backup de SQLite.
+
+        Copia `pages` páginas por paso con una conexión propia que mantiene
+        abierta una transacción de lectura: en WAL la app sigue escribiendo y,
+        como la copia ve siempre la misma instantánea, no vuelve a empezar con
+        cada escritura. `progress(estado, restantes, total)` se llama tras cada
+        paso. Devuelve el seq del último cambio incluido en la copia.
+        """
+        source = self._connect()
+        try:
+            source.execute("BEGIN")
+            cursor = source.execute("SELECT IFNULL(MAX(seq), 0) FROM cambios").fetchone()[0]
+            source.backup(target, pages=pages, progress=progress)
+            return cursor
+        finally:
+            source.close()
+
+
+# --- Trazado de consultas ---
+class _TracedConnection:
+    """Envuelve una conexión y avisa al trazador de cada consulta (SQL, duración y filas)."""
+
+    def __init__(self, conn, tracer):
+        self._conn = conn
+        self._tracer = tracer
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def execute(self, sql, params=()):
+        start = time.perf_counter()
+        return _TracedCursor(self._conn.execute(sql, params), sql, start, self._tracer)
+
+    def executemany(self, sql, rows):
+        start = time.perf_counter()
+        return _TracedCursor(self._conn.executemany(sql, rows), sql, start, self._tracer)
+
+
+class _TracedCursor:
+    """Cursor que cuenta las filas leídas; la consulta se registra al terminar de leerlas."""
+
+    def __init__(self, cursor, sql, start, tracer):
+        self._cursor = cursor
+        self._sql = sql
+        self._start = start
+        self._tracer = tracer
+        self._rows = 0
+        self._done = False
+        if cursor.description is None:
+            # Escrituras: no hay filas que leer
+            self._finish(max(cursor.rowcount, 0))
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def _finish(self, rows):
+        if not self._done:
+            self._done = True
+            self._tracer(self._sql, time.perf_counter() - self._start, rows)
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        self._finish(self._rows + (row is not None))
+        return row
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        self._finish(self._rows + len(rows))
+        return rows
+
+    def __iter__(self):
+        for row in self._cursor:
+            self._rows += 1
+            yield row
+        self._finish(self._rows)
+
+
+# --- Helpers de búsqueda ---
+def _digits(phone):
+    """Deja solo los dígitos del teléfono para indexarlo como una sola palabra."""
+    return re.sub(r"\D", "", phone or "")
+
+
+# Separadores entre grupos de dígitos de un teléfono ("55 12-34" -> "551234")
+_PHONE_GROUPS = re.compile(r"(?<=\d)[\s.\-/()]+(?=\d)")
+
+
+def _prefix_query(text, min_length=1):
+    """Convierte el texto del buscador en una consulta FTS5 de prefijos (AND)."""
+    words = [w for w in re.findall(r"\w+", text or "") if len(w) >= min_length]
+    return " ".join(f'"{w}"*' for w in words)
+
+
+# --- Migraciones (en orden; cada una recibe la AyurvedaDB) ---
+def _m1_base_schema(db):
+    def create(conn):
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS pacientes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                nombre TEXT NOT NULL,
+                domicilio TEXT,
+                telefono TEXT,
+                fecha_nacimiento TEXT,
+                nota TEXT,
+                prakruti_vata REAL DEFAULT 5,
+                prakruti_pitta REAL DEFAULT 5,
+                prakruti_kapha REAL DEFAULT 5,
+                prakruti_sattva REAL DEFAULT 5,
+                prakruti_rajas REAL DEFAULT 5,
+                prakruti_tamas REAL DEFAULT 5
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS consultas (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                paciente_id INTEGER NOT NULL REFERENCES pacientes(id),
+                fecha TEXT,
+                motivo TEXT,
+                sintomas TEXT,
+                vikruti_vata REAL DEFAULT 0,
+                vikruti_pitta REAL DEFAULT 0,
+                vikruti_kapha REAL DEFAULT 0,
+                guna_sattva REAL DEFAULT 5,
+                guna_rajas REAL DEFAULT 5,
+                guna_tamas REAL DEFAULT 5,
+                tratamiento TEXT,
+                detalle TEXT
+            )
+        """)
+        # Índice para el listado ordenado por nombre (paginación por clave)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_pacientes_nombre ON pacientes(nombre COLLATE NOCASE, id)")
+        # Índice para el historial de un paciente (más reciente primero)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_consultas_paciente_fecha ON consultas(paciente_id, fecha, id)")
+
+    db.run_once("esquema", create)
+
+
+def _m2_patient_search(db):
+    # Índice de búsqueda por prefijo sobre nombre y teléfono (sin acentos)
+    def create(conn):
+        conn.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS pacientes_fts USING fts5(
+                nombre, telefono,
+                tokenize = 'unicode61 remove_diacritics 2',
+                prefix = '2 3'
+            )
+        """)
+
+    db.run_once("pacientes_fts_tabla", create)
+
+    def index_chunk(conn, rows):
+        conn.executemany(
+            "INSERT OR REPLACE INTO pacientes_fts (rowid, nombre, telefono) VALUES (?, ?, ?)",
+            [(r["id"], r["nombre"], _digits(r["telefono"])) for r in rows]
+        )
+
+    db.run_in_chunks(
+        "pacientes_fts",
+        "SELECT id, nombre, telefono FROM pacientes WHERE id > ? ORDER BY id LIMIT ?",
+        index_chunk
+    )
+
+
+def _m3_legacy_imports(db):
+    def create(conn):
+        conn.execute("CREATE TABLE IF NOT EXISTS importaciones_legado (archivo TEXT PRIMARY KEY, fecha TEXT)")
+
+    db.run_once("esquema", create)
+
+
+def _m4_trend_rollups(db):
+    # Sumas mensuales de vikruti y gunas, mantenidas al insertar consultas
+    sums = ", ".join(f"{f} REAL NOT NULL DEFAULT 0" for f in TREND_FIELDS)
+    def create(conn):
+        conn.execute(f"CREATE TABLE IF NOT EXISTS tendencia_mensual (mes TEXT PRIMARY KEY, n INTEGER NOT NULL, {sums})")
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS tendencia_paciente_mensual ("
+            f"paciente_id INTEGER NOT NULL, mes TEXT NOT NULL, n INTEGER NOT NULL, {sums}, "
+            f"PRIMARY KEY (paciente_id, mes)) WITHOUT ROWID"
+        )
+
+    db.run_once("esquema", create)
+
+    db.run_in_chunks(
+        "tendencias",
+        "SELECT id FROM consultas WHERE id > ? ORDER BY id LIMIT ?",
+        lambda conn, rows: db._update_trends(conn, rows[0]["id"] - 1, rows[-1]["id"])
+    )
+
+
+def _m5_consultation_search(db):
+    # Búsqueda de texto en consultas; el texto se lee de la propia tabla consultas
+    def create(conn):
+        conn.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS consultas_fts USING fts5(
+                motivo, sintomas, tratamiento,
+                content = 'consultas', content_rowid = 'id',
+                tokenize = 'unicode61 remove_diacritics 2',
+                prefix = '2 3'
+            )
+        """)
+        # Relevancia: una coincidencia en el motivo pesa el doble que en síntomas o tratamiento
+        conn.execute("INSERT INTO consultas_fts (consultas_fts, rank) VALUES ('rank', 'bm25(2.0, 1.0, 1.0)')")
+
+    db.run_once("consultas_fts_tabla", create)
+
+    db.run_in_chunks(
+        "consultas_fts",
+        "SELECT id FROM consultas WHERE id > ? ORDER BY id LIMIT ?",
+        lambda conn, rows: db._update_consultation_search(conn, rows[0]["id"] - 1, rows[-1]["id"])
+    )
+
+
+def _m6_change_log(db):
+    # Registro de cambios: una fila por registro con el seq de su último cambio
+    def create(conn):
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS cambios (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                tabla TEXT NOT NULL,
+                fila_id INTEGER NOT NULL,
+                UNIQUE (tabla, fila_id)
+            )
+        """)
+        # Hasta dónde se ha copiado o sincronizado cada destino (seq del origen)
+        conn.execute("CREATE TABLE IF NOT EXISTS sincronizacion (clave TEXT PRIMARY KEY, cursor INTEGER NOT NULL)")
+
+    db.run_once("esquema", create)
+
+    # Los datos que ya existen cuentan como cambiados, para que una réplica nueva los reciba
+    for table in SYNC_TABLES:
+        db.run_in_chunks(
+            f"cambios_{table}",
+            f"SELECT id FROM {table} WHERE id > ? ORDER BY id LIMIT ?",
+            lambda conn, rows, table=table: db._log_changes(conn, table, rows[0]["id"] - 1, rows[-1]["id"])
+        )
+
+
+def _m7_drafts(db):
+    # Borradores autoguardados de los formularios, por ruta (ver drafts.py)
+    def create(conn):
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS borradores (
+                ruta TEXT PRIMARY KEY,
+                datos TEXT NOT NULL,
+                actualizado TEXT NOT NULL
+            )
+        """)
+
+    db.run_once("esquema", create)
+
+
+def _m8_import_ids(db):
+    # Id de origen de cada paciente importado -> su id en esta base (ver bulk.Importer)
+    def create(conn):
+        conn.execute("CREATE TABLE IF NOT EXISTS importacion_ids (externo TEXT PRIMARY KEY, id INTEGER NOT NULL)")
+
+    db.run_once("esquema", create)
+
+
+def _m9_invalid_trend_months(db):
+    # Las fechas sin formato AAAA-MM (p. ej. "5/2/2024") creaban meses como "5/2/202",
+    # que se ordenan después de todos los reales; las filas de meses válidos no cambian
+    def clean(conn):
+        for table in ("tendencia_mensual", "tendencia_paciente_mensual"):
+            conn.execute(f"DELETE FROM {table} WHERE NOT {_VALID_MONTH.format(col='mes')}")
+
+    db.run_once("meses", clean)
+
+
+def _m10_drafts_by_device(db):
+    # En el modo servidor varias sesiones abren las mismas rutas: cada dispositivo tiene sus
+    # borradores. Los que ya había son de la app de escritorio (dispositivo "local", ver main.py)
+    def move(conn):
+        conn.execute("""
+            CREATE TABLE borradores_dispositivo (
+                dispositivo TEXT NOT NULL,
+                ruta TEXT NOT NULL,
+                datos TEXT NOT NULL,
+                actualizado TEXT NOT NULL,
+                PRIMARY KEY (dispositivo, ruta)
+            )
+        """)
+        conn.execute(
+            "INSERT INTO borradores_dispositivo (dispositivo, ruta, datos, actualizado) "
+            "SELECT 'local', ruta, datos, actualizado FROM borradores"
+        )
+        conn.execute("DROP TABLE borradores")
+        conn.execute("ALTER TABLE borradores_dispositivo RENAME TO borradores")
+
+    db.run_once("borradores", move)
+
+
+def _m11_import_ids_by_source(db):
+    # Dos sistemas de origen pueden usar los mismos ids: la correspondencia va por origen
+    # (ver bulk.import_files). Las que ya había no tienen origen conocido y quedan con ''
+    def move(conn):
+        conn.execute("""
+            CREATE TABLE importacion_ids_origen (
+                origen TEXT NOT NULL,
+                externo TEXT NOT NULL,
+                id INTEGER NOT NULL,
+                PRIMARY KEY (origen, externo)
+            ) WITHOUT ROWID
+        """)
+        conn.execute("INSERT INTO importacion_ids_origen (origen, externo, id) SELECT '', externo, id FROM importacion_ids")
+        conn.execute("DROP TABLE importacion_ids")
+        conn.execute("ALTER TABLE importacion_ids_origen RENAME TO importacion_ids")
+
+    db.run_once("importacion_ids", move)
+
+
+MIGRATIONS = [
+    (1, "Esquema base de pacientes y consultas", _m1_base_schema),
+    (2, "Índice de búsqueda de pacientes", _m2_patient_search),
+    (3, "Registro de bases antiguas importadas", _m3_legacy_imports),
+    (4, "Resúmenes mensuales de tendencias", _m4_trend_rollups),
+    (5, "Índice de búsqueda en consultas", _m5_consultation_search),
+    (6, "Registro de cambios", _m6_change_log),
+    (7, "Borradores de formularios", _m7_drafts),
+    (8, "Correspondencia de ids importados", _m8_import_ids),
+    (9, "Meses no válidos en las tendencias", _m9_invalid_trend_months),
+    (10, "Borradores por dispositivo", _m10_drafts_by_device),
+    (11, "Ids importados por origen", _m11_import_ids_by_source),
+]
@@ -0,0 +1,56 @@
+"""Autoguardado de los formularios en borradores (ver AyurvedaDB.save_drafts)."""
+import threading
+
+# Máximo de segundos que un cambio espera en memoria antes de escribirse
+DRAFT_FLUSH_SECONDS = 3.0
+
+
+class DraftJournal:
+    """Diario write-behind de los borradores de un dispositivo, uno por ruta de formulario.
+
+    update() solo sustituye en memoria el borrador de la ruta, así que no
+    frena al teclear ni al arrastrar un slider. Lo pendiente se escribe como
+    mucho cada `interval` segundos con una sola escritura en el hilo escritor
+    del DBWorker: cien pulsaciones en un campo acaban en una fila actualizada.
+    Los borradores se guardan con la clave `device`, así dos sesiones del
+    servidor en la misma ruta no comparten borrador.
+    """
+
+    def __init__(self, worker, device, interval=DRAFT_FLUSH_SECONDS):
+        self.worker = worker
+        self.device = device
+        self.interval = interval
+        self._pending = {}  # ruta -> campos del borrador (None: borrarlo)
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def update(self, route, fields):
+        """Anota el estado actual del formulario de `route`; se escribirá en el siguiente volcado."""
+        with self._lock:
+            self._pending[route] = fields
+            if self._timer is None:
+                self._timer = threading.Timer(self.interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def discard(self, route):
+        """Borra el borrador de `route` (el formulario se guardó o se descartó)."""
+        with self._lock:
+            self._pending.pop(route, None)
+            # Encolado con el cerrojo: un volcado en curso no puede escribir el borrador después
+            self.worker.write("save_drafts", self.device, {route: None})
+
+    def discard_when_saved(self, route, future):
+        """Borra el borrador de `route` cuando la escritura `future` se confirme; si falla, se conserva."""
+        future.add_done_callback(lambda f: f.exception() is None and self.discard(route))
+
+    def flush(self):
+        """Escribe ya lo pendiente. Devuelve el Future de la escritura, o None si no había nada."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pending:
+                return None
+            drafts, self._pending = self._pending, {}
+            return self.worker.write("save_drafts", self.device, drafts)
@@ -1,8 +1,401 @@
+import time
+# Referencia para medir cuánto tarda el arranque en importar módulos
+PROCESS_START = time.perf_counter()
+
 import flet as ft
 from database import AyurvedaDB
-import datetime
+from cache import CachedAyurvedaDB, LRUCache
+from worker import DBWorker
+from drafts import DraftJournal
+from perf import monitor
+from screens.common import patient_card, sort_key, consultation_tile, history_order
+import screens
+import asyncio
+import concurrent.futures
+import os
+import uuid
+
+IMPORT_SECONDS = time.perf_counter() - PROCESS_START
+
+DB_FILE = "pacientes_v5.db"
+
+# Vistas que se guardan en caché; los formularios se construyen siempre de nuevo
+CACHED_ROUTES = ["/", "/pacientes", "/paciente/:id"]
+# Vistas guardadas como máximo por sesión (las fichas de paciente son las que se acumulan)
+VIEW_CACHE_SIZE = 16
+# Nombre de la copia de seguridad dentro de la carpeta elegida (las siguientes son incrementales)
+BACKUP_FILE = "pacientes_copia.db"
+# Tema de page.pubsub con el que las sesiones del servidor se avisan de sus escrituras
+CHANGES_TOPIC = "cambios"
+# Dispositivo de los borradores en la app de escritorio; en el servidor, cada navegador
+# guarda el suyo en client_storage con esta clave
+LOCAL_DEVICE = "local"
+DEVICE_STORAGE_KEY = "ayurveda.dispositivo"
+# Máximo de segundos que el cierre de la sesión espera a las escrituras en cola
+CLOSE_FLUSH_SECONDS = 5
+
+
+class App:
+    """Sesión de la app: la página, la base y el estado que comparten las pantallas (ver screens/).
+
+    La base se abre y migra en segundo plano con open_database(); hasta
+    entonces `db` y `worker` son None y `db_ready` está pendiente. Las rutas
+    que no leen la base (la portada) se pintan sin esperarla.
+
+    En el modo servidor (ver server.py) `shared` es la base del proceso: la
+    sesión usa sus hilos y conexiones con una caché propia, y se entera de
+    las escrituras de las demás sesiones por page.pubsub.
+    """
+
+    def __init__(self, page, db_file, started, shared=None):
+        self.page = page
+        self.db_file = db_file
+        self.started = started
+        self.shared = shared
+        self.db = None
+        self.worker = None
+        self.drafts = None
+        self.db_ready = concurrent.futures.Future()
+        # Duración de cada fase del arranque, en ms
+        self.startup = {"importar_modulos": IMPORT_SECONDS * 1000}
+        # Vistas ya construidas por ruta; al descartar una ficha se descarta también su historial
+        self.view_cache = LRUCache(VIEW_CACHE_SIZE, on_evict=self.on_view_evicted)
+        # Controles que se parchean tras guardar, para no reconstruir la vista entera
+        self.list_state = {}        # ListView del listado, paginación y tarjetas por id
+        self.history_state = LRUCache(VIEW_CACHE_SIZE)  # patient_id -> ListView del historial del dashboard y su paginación
+        # Cargas diferidas que se lanzan en segundo plano una vez pintada la vista
+        self.after_show = []
+        self.import_picker = ft.FilePicker(on_result=self.on_import_picked)
+        self.export_picker = ft.FilePicker(on_result=self.on_export_picked)
+        self.backup_picker = ft.FilePicker(on_result=self.on_backup_picked)
+
+    def mark(self, phase, seconds):
+        self.startup[phase] = seconds * 1000
+        if monitor.enabled:
+            monitor.record("arranque", phase, seconds)
+
+    # --- Arranque ---
+    def open_database(self):
+        """Abre y migra la base (en un hilo aparte) y deja listos la caché y el worker."""
+        start = time.perf_counter()
+        try:
+            if self.shared is not None:
+                raw_db, shared_worker = self.shared.open()
+            else:
+                raw_db = AyurvedaDB(self.db_file)
+        except Exception as ex:
+            self.db_ready.set_exception(ex)
+            return
+        self.mark("abrir_base", time.perf_counter() - start)
+        self.db = CachedAyurvedaDB(raw_db)
+        if self.shared is not None:
+            # Hilos y conexiones del proceso; la caché es de esta sesión
+            self.worker = shared_worker.bind(self.db, on_commit=self.on_commit)
+            self.page.pubsub.subscribe_topic(CHANGES_TOPIC, self.on_remote_change)
+        else:
+            # Trazado de consultas SQL cuando la instrumentación está activa (ver /debug/perf)
+            monitor.attach(raw_db)
+            # Lecturas en un pool de hilos y escrituras en un hilo escritor aparte
+            self.worker = DBWorker(self.db)
+        # Autoguardado de los formularios, por el mismo hilo escritor
+        self.drafts = DraftJournal(self.worker, self.draft_device())
+        self.db_ready.set_result(self.db)
+        self.mark("base_lista", time.perf_counter() - self.started)
+        # El listado es la siguiente pantalla que se abre: se importa ya
+        screens.load("/pacientes")
+        if self.shared is None:
+            # En el servidor lo importa SharedDatabase.open() una sola vez
+            start = time.perf_counter()
+            self.run_legacy_import()
+            self.mark("importar_legado", time.perf_counter() - start)
+
+    def draft_device(self):
+        """Clave de los borradores de esta sesión: la del navegador en el servidor, fija en escritorio."""
+        if self.shared is None:
+            return LOCAL_DEVICE
+        device = self.page.client_storage.get(DEVICE_STORAGE_KEY)
+        if not device:
+            device = uuid.uuid4().hex
+            self.page.client_storage.set(DEVICE_STORAGE_KEY, device)
+        return device
+
+    # --- Navegación ---
+    def get_view(self, route):
+        view = self.view_cache.get(route)
+        if view is None:
+            with monitor.measure_build(screens.route_name(route)):
+                view = screens.build_view(self, route)
+            troute = ft.TemplateRoute(route)
+            if view is not None and any(troute.match(r) for r in CACHED_ROUTES):
+                self.view_cache.put(route, view)
+        return view
+
+    def on_view_evicted(self, route, view):
+        """Una ficha que sale de la caché se lleva su historial (ya no se parchea)."""
+        troute = ft.TemplateRoute(route)
+        if troute.match("/paciente/:id"):
+            self.history_state.pop(int(troute.id))
+
+    def route_stack(self, route):
+        """Rutas de la pila de navegación que termina en `route` (para volver atrás)."""
+        troute = ft.TemplateRoute(route)
+        if troute.match("/"):
+            return ["/"]
+        if troute.match("/pacientes") or troute.match("/nuevo_paciente"):
+            return ["/", "/pacientes"] if route == "/pacientes" else ["/", "/pacientes", route]
+        if troute.match("/paciente/:id"):
+            return ["/", "/pacientes", route]
+        if troute.match("/editar_paciente/:id"):
+            return ["/", "/pacientes", f"/paciente/{troute.id}", route]
+        if troute.match("/consulta/:paciente_id"):
+            return ["/", "/pacientes", f"/paciente/{troute.paciente_id}", route]
+        if troute.match("/tendencias"):
+            return ["/", route]
+        if troute.match("/tendencias/:id"):
+            return ["/", "/pacientes", f"/paciente/{troute.id}", route]
+        if troute.match("/buscar_consultas") or troute.match("/debug/perf"):
+            return ["/", route]
+        return [route]
+
+    async def route_change(self, route):
+        page = self.page
+        target = page.route
+        if self.drafts is not None:
+            # Al salir de un formulario su borrador se escribe sin esperar al siguiente volcado
+            self.drafts.flush()
+        with monitor.measure("navegacion", screens.route_name(target)):
+            views = []
+            for r in self.route_stack(target):
+                view = self.view_cache.get(r)
+                if view is None and not screens.needs_db(r):
+                    view = self.get_view(r)
+                elif view is None:
+                    # La base se abre en segundo plano al arrancar; normalmente ya está lista
+                    try:
+                        await asyncio.wrap_future(self.db_ready)
+                    except Exception:
+                        self.show_message("No se pudo abrir la base de datos")
+                        return
+                    # Construir la vista (y hacer sus lecturas) sin bloquear el bucle de eventos
+                    view = await self.worker.run(self.get_view, r)
+                if view is None:
+                    return
+                views.append(view)
+            if page.route != target:
+                return  # hubo otra navegación mientras se construía
+            page.views.clear()
+            page.views.extend(views)
+            with monitor.measure("update", screens.route_name(target)):
+                page.update()
+        if "primer_frame" not in self.startup:
+            self.mark("primer_frame", time.perf_counter() - self.started)
+        while self.after_show:
+            page.run_thread(self.after_show.pop(0))
+
+    def view_pop(self, view):
+        self.page.views.pop()
+        top_view = self.page.views[-1]
+        self.page.go(top_view.route)
+
+    def on_keyboard(self, e: ft.KeyboardEvent):
+        # Atajo a la pantalla oculta de rendimiento
+        if e.ctrl and e.shift and e.key.upper() == "P":
+            self.page.go("/debug/perf")
+
+    # --- Guardado ---
+    def on_patient_saved(self, data, patient_id):
+        """Invalida la vista del paciente y parchea solo su tarjeta en el listado."""
+        self.view_cache.pop(f"/paciente/{patient_id}")
+        if not self.list_state:
+            return
+        patient = dict(data, id=patient_id)
+        patient_list = self.list_state["list"]
+        cards = self.list_state["cards"]
+        if patient_id in cards:
+            patient_list.controls.remove(cards.pop(patient_id))
+        # Insertar la tarjeta en orden si cae dentro de lo ya cargado;
+        # si no, aparecerá al cargar las páginas siguientes
+        key = sort_key(patient)
+        cursor = self.list_state["paging"]["cursor"]
+        if cursor is not None and key > sort_key({"nombre": cursor[0], "id": cursor[1]}):
+            return
+        loaded = [c for c in patient_list.controls if c.data is not None]
+        index = len(loaded)
+        for i, card in enumerate(loaded):
+            if key < sort_key(card.data):
+                index = i
+                break
+        if not loaded:
+            patient_list.controls.clear()  # quitar el aviso "No hay pacientes"
+        cards[patient_id] = patient_card(self.page, patient)
+        patient_list.controls.insert(index, cards[patient_id])
+
+    def on_write_done(self, future, on_success=None, on_error=None):
+        """Callback de una escritura encolada: aplica `on_success(resultado)` o avisa del error y llama a `on_error()`."""
+        page = self.page
+        if future.exception() is not None:
+            if on_error is not None:
+                on_error()
+            page.snack_bar = ft.SnackBar(ft.Text("No se pudieron guardar los datos"), bgcolor=ft.Colors.RED_700)
+            page.snack_bar.open = True
+        elif on_success is not None:
+            on_success(future.result())
+        page.update()
+
+    def on_patient_save_failed(self, patient_id):
+        """Deshace una edición optimista que no se pudo escribir: caché, ficha y tarjeta vuelven a lo guardado."""
+        self.db.forget_patient(patient_id)
+        self.view_cache.pop(f"/paciente/{patient_id}")
+        patient = self.db.get_patient(patient_id)
+        if patient is not None:
+            self.on_patient_saved(patient, patient_id)
+
+    def on_consultation_saved(self, data, consultation_id):
+        """Añade una consulta ya guardada al historial construido, si lo hay, en su lugar por fecha.
+
+        Si cae después de lo ya cargado no se añade: llegará con las páginas siguientes.
+        """
+        history = self.history_state.get(int(data["paciente_id"]))
+        if history is None:
+            return
+        controls = history["list"].controls
+        start = controls.index(history["header"]) + 1
+        end = controls.index(history["loading"])
+        tiles = [c.data for c in controls[start:end] if isinstance(c.data, dict)]
+        if any(c["id"] == consultation_id for c in tiles):
+            return  # la página se leyó después del commit y ya la trae
+        consultation = dict(data, id=consultation_id)
+        # Mismo orden que get_consultations_page: fecha descendente (sin fecha al final) e id descendente
+        key = history_order(consultation)
+        position = next((i for i, c in enumerate(tiles) if history_order(c) < key), None)
+        if position is None and not history["done"]:
+            return
+        if not tiles and end > start:
+            controls.pop(start)  # quitar el aviso "No hay consultas"
+        controls.insert(start + (len(tiles) if position is None else position), consultation_tile(consultation, self.db.get_consultation))
 
-def main(page: ft.Page):
+    # --- Varias sesiones (modo servidor) ---
+    def on_commit(self, method, args, result):
+        """Tras el commit de una escritura de esta sesión, avisa a las demás (hilo escritor)."""
+        if method == "save_patient":
+            message = {"tipo": "paciente", "id": result, "datos": args[0]}
+        elif method == "save_consultation":
+            message = {"tipo": "consulta", "id": result, "datos": args[0]}
+        else:
+            return
+        self.page.pubsub.send_others_on_topic(CHANGES_TOPIC, message)
+
+    def on_remote_change(self, topic, message):
+        """Otra sesión escribió: invalida la caché y parchea las vistas ya construidas."""
+        if self.db is None:
+            return
+        if message["tipo"] == "paciente":
+            self.db.patient_changed(message["id"], message["datos"])
+            self.on_patient_saved(message["datos"], message["id"])
+        elif message["tipo"] == "consulta":
+            self.db.consultation_added(message["datos"]["paciente_id"])
+            self.on_consultation_saved(message["datos"], message["id"])
+        else:
+            self.reset_views()
+        self.page.update()
+
+    def close(self, e=None):
+        """Fin de la sesión: escribe los borradores, deja de recibir avisos y suelta las vistas y la caché."""
+        if self.drafts is not None:
+            self.drafts.flush()
+        if self.worker is not None:
+            # El hilo escritor es daemon: lo que siga en cola al salir del proceso se perdería
+            try:
+                self.worker.flush(CLOSE_FLUSH_SECONDS)
+            except Exception:
+                pass  # la sesión se cierra igualmente
+        if self.shared is not None:
+            self.page.pubsub.unsubscribe_all()
+        self.view_cache.clear()
+        self.list_state.clear()
+        self.history_state.clear()
+        if self.db is not None:
+            self.db.clear()
+
+    # --- Importación / Exportación ---
+    def reset_views(self):
+        """Descarta cachés y vistas construidas tras cambios masivos en la base."""
+        self.db.clear()
+        self.view_cache.clear()
+        self.list_state.clear()
+        self.history_state.clear()
+
+    def run_legacy_import(self):
+        # Datos de pacientes_v1..v4.db, una sola vez y sin bloquear el arranque
+        imported = self.db.import_legacy_databases(os.path.dirname(os.path.abspath(self.db_file)))
+        if imported:
+            self.reset_views()
+            self.show_message(f"Datos importados de {imported}")
+            self.page.go(self.page.route)
+
+    def show_message(self, text):
+        self.page.snack_bar = ft.SnackBar(ft.Text(text))
+        self.page.snack_bar.open = True
+        self.page.update()
+
+    def run_import(self, paths):
+        import bulk  # solo se carga si se importa o exporta
+
+        # Todo en este hilo: la sesión de importación usa una tabla temporal de su conexión
+        def progress(kind, count):
+            self.show_message(f"Importando {kind}: {count}")
+        try:
+            patients, consultations, skipped = bulk.import_files(self.db, paths, progress)
+        except Exception as ex:
+            self.show_message(f"Error al importar: {ex}")
+            return
+        self.reset_views()
+        if self.shared is not None:
+            self.page.pubsub.send_others_on_topic(CHANGES_TOPIC, {"tipo": "todo"})
+        self.show_message(f"Importados {patients} pacientes y {consultations} consultas ({skipped} filas omitidas)")
+        self.page.go("/pacientes")
+
+    def on_import_picked(self, e: ft.FilePickerResultEvent):
+        if e.files:
+            self.page.run_thread(self.run_import, [f.path for f in e.files])
+
+    def run_export(self, folder):
+        import bulk
+
+        try:
+            patients = bulk.export_patients(self.db, os.path.join(folder, "pacientes.csv"))
+            consultations = bulk.export_consultations(self.db, os.path.join(folder, "consultas.csv"))
+        except Exception as ex:
+            self.show_message(f"Error al exportar: {ex}")
+            return
+        self.show_message(f"Exportados {patients} pacientes y {consultations} consultas")
+
+    def on_export_picked(self, e: ft.FilePickerResultEvent):
+        if e.path:
+            self.page.run_thread(self.run_export, e.path)
+
+    def run_backup(self, folder):
+        import backup
+
+        try:
+            kind, count = backup.backup_database(self.db, os.path.join(folder, BACKUP_FILE), self.show_message)
+        except Exception as ex:
+            self.show_message(f"Error en la copia de seguridad: {ex}")
+            return
+        if kind == "completa":
+            self.show_message(f"Copia de seguridad completa ({count} páginas)")
+        else:
+            self.show_message(f"Copia de seguridad actualizada ({count} cambios)")
+
+    def on_backup_picked(self, e: ft.FilePickerResultEvent):
+        if e.path:
+            # En segundo plano: la copia va por pasos y la app sigue guardando mientras tanto
+            self.page.run_thread(self.run_backup, e.path)
+
+
+def main(page: ft.Page, shared=None):
+    """Una sesión de la app. `shared` es la base compartida en el modo servidor (ver server.py)."""
+    started = time.perf_counter()
     # --- Configuración General ---
     page.title = "Ayurveda & Coaching"
     page.theme_mode = ft.ThemeMode.LIGHT
@@ -12,473 +405,18 @@ def main(page: ft.Page):
     )
     # Fondo cálido y premium
     page.bgcolor = ft.Colors.ORANGE_50
-    page.padding = 0 
-    
-    # Inicializar Base de Datos (V5)
-    db = AyurvedaDB("pacientes_v5.db")
-    
-    # --- Helpers ---
-    def calculate_age_str(birth_date_str):
-        if not birth_date_str: return "N/A"
-        try:
-            birth_date = datetime.datetime.strptime(birth_date_str, "%Y-%m-%d").date()
-            today = datetime.date.today()
-            age = today.year - birth_date.year - ((today.month, today.day) < (birth_date.month, birth_date.day))
-            return str(age)
-        except:
-            return "?"
-
-    def create_compact_slider(label, color, initial_value=5):
-        """Crea un control de columna con Label y Slider."""
-        # Slider más compacto (height=20)
-        slider = ft.Slider(min=0, max=10, divisions=10, value=initial_value, label="{value}", active_color=color, height=20)
-        return ft.Column([
-            ft.Text(label, size=11, color=color, weight="bold"),
-            slider
-        ], spacing=0, expand=True)
-
-    # --- Route Handler ---
-    def route_change(route):
-        page.views.clear()
-        
-        troute = ft.TemplateRoute(page.route)
-        
-        # ---------------------------------------------------------
-        # 1. HOME (Landing)
-        # ---------------------------------------------------------
-        if troute.match("/"):
-            page.views.append(
-                ft.View(
-                    "/",
-                    [
-                        ft.AppBar(
-                            title=ft.Text("Ayurveda Manager"), 
-                            center_title=True,
-                            bgcolor=ft.Colors.TEAL_700, 
-                            color=ft.Colors.WHITE,
-                            elevation=4
-                        ),
-                        ft.Container(
-                            gradient=ft.LinearGradient(
-                                begin=ft.alignment.top_center,
-                                end=ft.alignment.bottom_center,
-                                colors=[ft.Colors.ORANGE_50, ft.Colors.ORANGE_100],
-                            ),
-                            padding=20,
-                            alignment=ft.alignment.center,
-                            content=ft.Column([
-                                ft.Icon(ft.Icons.SPA, size=100, color=ft.Colors.TEAL_600),
-                                ft.Text("Gestión de Pacientes", size=24, weight="bold", color=ft.Colors.BROWN_800),
-                                ft.Text("Ayurveda y Coaching", size=16, color=ft.Colors.BROWN_600),
-                                ft.Container(height=40),
-                                ft.ElevatedButton(
-                                    content=ft.Container(
-                                        content=ft.Row([
-                                            ft.Icon(ft.Icons.PEOPLE, size=30, color=ft.Colors.WHITE),
-                                            ft.Text("VER PACIENTES", size=18, weight="bold", color=ft.Colors.WHITE),
-                                        ], alignment=ft.MainAxisAlignment.CENTER),
-                                        padding=ft.padding.symmetric(vertical=15, horizontal=20)
-                                    ),
-                                    style=ft.ButtonStyle(
-                                        bgcolor=ft.Colors.TEAL_600,
-                                        shape=ft.RoundedRectangleBorder(radius=10),
-                                        elevation=5
-                                    ),
-                                    on_click=lambda _: page.go("/pacientes")
-                                )
-                            ], horizontal_alignment=ft.CrossAxisAlignment.CENTER, alignment=ft.MainAxisAlignment.CENTER),
-                            expand=True
-                        )
-                    ],
-                    padding=0,
-                    scroll=ft.ScrollMode.AUTO
-                )
-            )
-
-        # ---------------------------------------------------------
-        # 2. LISTA DE PACIENTES
-        # ---------------------------------------------------------
-        elif troute.match("/pacientes"):
-            pacientes_list = db.get_patients()
-            
-            list_items = []
-            if not pacientes_list:
-                list_items.append(
-                    ft.Container(
-                        content=ft.Text("No hay pacientes registrados.", italic=True, color=ft.Colors.GREY_700),
-                        alignment=ft.alignment.center,
-                        padding=40
-                    )
-                )
-            
-            for p in pacientes_list:
-                age_str = calculate_age_str(p['fecha_nacimiento'])
-                list_items.append(
-                    ft.Card(
-                        content=ft.ListTile(
-                            leading=ft.CircleAvatar(
-                                content=ft.Text(p['nombre'][0].upper(), weight="bold"), 
-                                bgcolor=ft.Colors.TEAL_100, 
-                                color=ft.Colors.TEAL_900
-                            ),
-                            title=ft.Text(p['nombre'], weight="bold", size=16),
-                            subtitle=ft.Text(f"Edad: {age_str} | Tel: {p['telefono'] or '-'}", size=12),
-                            trailing=ft.IconButton(ft.Icons.EDIT, icon_color=ft.Colors.TEAL_600, on_click=lambda e, pid=p['id']: page.go(f"/editar_paciente/{pid}")),
-                            on_click=lambda e, pid=p['id']: page.go(f"/paciente/{pid}")
-                        ),
-                        elevation=2,
-                        color=ft.Colors.WHITE,
-                        margin=ft.margin.only(bottom=8)
-                    )
-                )
-
-            page.views.append(
-                ft.View(
-                    "/pacientes",
-                    [
-                        ft.AppBar(title=ft.Text("Pacientes"), bgcolor=ft.Colors.TEAL_700, color=ft.Colors.WHITE),
-                        ft.Container(
-                            padding=15,
-                            content=ft.Column([
-                                ft.ListView(controls=list_items, expand=True, spacing=5),
-                                ft.Container(height=10),
-                                ft.FloatingActionButton(
-                                    icon=ft.Icons.ADD,
-                                    bgcolor=ft.Colors.DEEP_ORANGE_500,
-                                    on_click=lambda _: page.go("/nuevo_paciente")
-                                )
-                            ], expand=True),
-                            gradient=ft.LinearGradient(
-                                begin=ft.alignment.top_center, 
-                                end=ft.alignment.bottom_center, 
-                                colors=[ft.Colors.ORANGE_50, ft.Colors.WHITE]
-                            )
-                        )
-                    ],
-                    padding=0
-                )
-            )
-
-        # ---------------------------------------------------------
-        # 3. FORMULARIO PACIENTE (NUEVO / EDITAR)
-        # ---------------------------------------------------------
-        elif troute.match("/nuevo_paciente") or troute.match("/editar_paciente/:id"):
-            is_edit = "/editar_paciente/" in page.route
-            patient_id = troute.id if is_edit else None
-            
-            # Datos iniciales
-            p_data = {}
-            if is_edit:
-                p_data = db.get_patient(patient_id)
-                if not p_data:
-                    page.go("/pacientes")
-                    return
-
-            # Inputs
-            txt_nombre = ft.TextField(label="Nombre Completo", text_size=14, border_color=ft.Colors.TEAL, value=p_data.get("nombre", ""))
-            txt_domicilio = ft.TextField(label="Domicilio", text_size=14, border_color=ft.Colors.TEAL, value=p_data.get("domicilio", ""))
-            txt_telefono = ft.TextField(label="Teléfono", keyboard_type=ft.KeyboardType.PHONE, text_size=14, border_color=ft.Colors.TEAL, value=p_data.get("telefono", ""))
-            
-            # Fecha y Edad calculada
-            def on_dob_change(e):
-                age_lbl.value = f"Edad: {calculate_age_str(txt_nacimiento.value)}"
-                age_lbl.update()
-
-            txt_nacimiento = ft.TextField(
-                label="Fecha Nac. (YYYY-MM-DD)", 
-                hint_text="Ej: 1990-12-31", 
-                text_size=14, 
-                border_color=ft.Colors.TEAL,
-                value=p_data.get("fecha_nacimiento", ""),
-                on_change=on_dob_change
-            )
-            initial_age = calculate_age_str(p_data.get("fecha_nacimiento", ""))
-            age_lbl = ft.Text(f"Edad: {initial_age}", size=14, weight="bold", color=ft.Colors.TEAL_800)
-
-            txt_nota = ft.TextField(label="Antecedentes / Notas", multiline=True, min_lines=3, border_color=ft.Colors.TEAL, value=p_data.get("nota", ""))
-
-            # Sliders (extraer helper)
-            v_vata = create_compact_slider("Vata (Aire)", ft.Colors.BLUE, p_data.get("prakruti_vata", 5))
-            v_pitta = create_compact_slider("Pitta (Fuego)", ft.Colors.RED, p_data.get("prakruti_pitta", 5))
-            v_kapha = create_compact_slider("Kapha (Tierra)", ft.Colors.GREEN, p_data.get("prakruti_kapha", 5))
-            
-            g_sattva = create_compact_slider("Sattva", ft.Colors.AMBER, p_data.get("prakruti_sattva", 5))
-            g_rajas = create_compact_slider("Rajas", ft.Colors.ORANGE, p_data.get("prakruti_rajas", 5))
-            g_tamas = create_compact_slider("Tamas", ft.Colors.GREY, p_data.get("prakruti_tamas", 5))
-
-            def guardar_paciente(e):
-                if not txt_nombre.value:
-                    txt_nombre.error_text = "El nombre es obligatorio"
-                    txt_nombre.update()
-                    return
-                
-                data = {
-                    "id": patient_id, # None si es nuevo
-                    "nombre": txt_nombre.value,
-                    "domicilio": txt_domicilio.value,
-                    "telefono": txt_telefono.value,
-                    "fecha_nacimiento": txt_nacimiento.value,
-                    "nota": txt_nota.value,
-                    "prakruti_vata": v_vata.controls[1].value,
-                    "prakruti_pitta": v_pitta.controls[1].value,
-                    "prakruti_kapha": v_kapha.controls[1].value,
-                    "prakruti_sattva": g_sattva.controls[1].value,
-                    "prakruti_rajas": g_rajas.controls[1].value,
-                    "prakruti_tamas": g_tamas.controls[1].value,
-                }
-                db.save_patient(data)
-                page.snack_bar = ft.SnackBar(ft.Text("Paciente guardado correctamente"))
-                page.snack_bar.open = True
-                page.go("/pacientes")
-
-            title_text = "Editar Ficha" if is_edit else "Nueva Ficha"
-            
-            page.views.append(
-                ft.View(
-                    page.route,
-                    [
-                        ft.AppBar(title=ft.Text(title_text), bgcolor=ft.Colors.TEAL_700, color=ft.Colors.WHITE),
-                        ft.Container(
-                            padding=20,
-                            content=ft.Column([
-                                ft.Text("Datos Personales", size=16, weight="bold", color=ft.Colors.TEAL_900),
-                                txt_nombre,
-                                txt_domicilio,
-                                ft.Row([ft.Column([txt_nacimiento], expand=True), ft.Column([age_lbl], expand=False)], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
-                                txt_telefono,
-                                ft.Divider(),
-                                ft.Text("Constitución Prakruti (Doshas)", size=16, weight="bold", color=ft.Colors.TEAL_900),
-                                ft.Row([v_vata, v_pitta, v_kapha], alignment=ft.MainAxisAlignment.SPACE_EVENLY),
-                                ft.Divider(),
-                                ft.Text("Estado Mental (Gunas)", size=16, weight="bold", color=ft.Colors.TEAL_900),
-                                ft.Row([g_sattva, g_rajas, g_tamas], alignment=ft.MainAxisAlignment.SPACE_EVENLY),
-                                ft.Divider(),
-                                txt_nota,
-                                ft.Container(height=20),
-                                ft.ElevatedButton(
-                                    "Guardar Ficha", 
-                                    icon=ft.Icons.SAVE, 
-                                    bgcolor=ft.Colors.TEAL_700, 
-                                    color=ft.Colors.WHITE, 
-                                    style=ft.ButtonStyle(shape=ft.RoundedRectangleBorder(radius=8)),
-                                    width=float('inf'), 
-                                    height=50,
-                                    on_click=guardar_paciente
-                                )
-                            ] )
-                        )
-                    ],
-                    bgcolor=ft.Colors.WHITE,
-                    scroll=ft.ScrollMode.AUTO
-                )
-            )
-
-        # ---------------------------------------------------------
-        # 4. VISTA DETALLE PACIENTE (DASHBOARD)
-        # ---------------------------------------------------------
-        elif troute.match("/paciente/:id"):
-            patient_id = troute.id
-            patient = db.get_patient(patient_id)
-            if not patient:
-                page.go("/pacientes")
-                return
-            
-            consultas = db.get_consultations_by_patient(patient_id)
-            age = calculate_age_str(patient['fecha_nacimiento'])
-            
-            # --- Cards de Info ---
-            def info_row(icon, label, value):
-                return ft.Row([ft.Icon(icon, size=16, color=ft.Colors.TEAL), ft.Text(f"{label}: ", weight="bold"), ft.Text(value)], spacing=5)
-
-            # --- Lista Historial ---
-            history_tiles = []
-            if consultas:
-                for c in consultas:
-                    history_tiles.append(
-                        ft.Container(
-                           bgcolor=ft.Colors.WHITE,
-                           border=ft.border.all(1, ft.Colors.GREY_300),
-                           border_radius=8,
-                           padding=10,
-                           content=ft.Column([
-                               ft.Row([
-                                   ft.Icon(ft.Icons.CALENDAR_MONTH, size=16, color=ft.Colors.TEAL),
-                                   ft.Text(f"{c['fecha']}", weight="bold"),
-                                   ft.Container(expand=True),
-                                   ft.Icon(ft.Icons.INFO_OUTLINE, size=16, color=ft.Colors.GREY)
-                               ]),
-                               ft.Text(f"Motivo: {c['motivo']}", size=13, weight="w500"),
-                               ft.Text(f"Síntomas: {c.get('sintomas', '-')}", size=12, italic=True, color=ft.Colors.GREY_700),
-                               ft.Text(f"Vikruti: V{int(c.get('vikruti_vata',0))} P{int(c.get('vikruti_pitta',0))} K{int(c.get('vikruti_kapha',0))}", size=11, color=ft.Colors.TEAL),
-                               ft.Divider(height=5),
-                               ft.Text(f"Tratamiento: {c.get('tratamiento', '')}", size=12, max_lines=2, overflow=ft.TextOverflow.ELLIPSIS)
-                           ])
-                        )
-                    )
-            else:
-                history_tiles.append(ft.Text("No hay consultas registradas.", italic=True))
-
-            page.views.append(
-                ft.View(
-                    f"/paciente/{patient_id}",
-                    [
-                        ft.AppBar(
-                            leading=ft.IconButton(ft.Icons.ARROW_BACK, on_click=lambda _: page.go("/pacientes"), tooltip="Volver a Lista"),
-                            title=ft.Text(patient['nombre']), 
-                            bgcolor=ft.Colors.TEAL_700, 
-                            color=ft.Colors.WHITE, 
-                            actions=[
-                                ft.IconButton(ft.Icons.EDIT, tooltip="Editar Ficha", on_click=lambda _: page.go(f"/editar_paciente/{patient_id}"))
-                            ]
-                        ),
-                        ft.Container(
-                            padding=15,
-                            content=ft.Column([
-                                # HEADER INFO
-                                ft.Container(
-                                    padding=15,
-                                    bgcolor=ft.Colors.TEAL_50,
-                                    border_radius=10,
-                                    content=ft.Column([
-                                        ft.Row([
-                                            ft.Icon(ft.Icons.PERSON, size=40, color=ft.Colors.TEAL_800),
-                                            ft.Column([
-                                                ft.Text(patient['nombre'], size=18, weight="bold", color=ft.Colors.TEAL_900),
-                                                ft.Text(f"Edad: {age} años", size=12)
-                                            ])
-                                        ]),
-                                        ft.Divider(color=ft.Colors.TEAL_200),
-                                        info_row(ft.Icons.PHONE, "Tel", patient.get('telefono', '-')),
-                                        info_row(ft.Icons.HOME, "Dom", patient.get('domicilio', '-')),
-                                        ft.Container(height=5),
-                                        ft.Text("Antecedentes:", weight="bold", size=12),
-                                        ft.Text(patient.get('nota', '-'), size=12, italic=True),
-                                        ft.Container(height=5),
-                                        ft.Container(height=5),
-                                        # Doshas y Gunas Explicitos
-                                        ft.Row([
-                                            ft.Column([
-                                                ft.Text("Prakruti (Doshas)", size=12, weight="bold", color=ft.Colors.TEAL_900),
-                                                ft.Text(f"Vata: {int(patient['prakruti_vata'])}", size=12),
-                                                ft.Text(f"Pitta: {int(patient['prakruti_pitta'])}", size=12),
-                                                ft.Text(f"Kapha: {int(patient['prakruti_kapha'])}", size=12),
-                                            ]),
-                                            ft.VerticalDivider(width=20, color=ft.Colors.GREY_300),
-                                            ft.Column([
-                                                ft.Text("Gunas (Mente)", size=12, weight="bold", color=ft.Colors.ORANGE_900),
-                                                ft.Text(f"Sattva: {int(patient['prakruti_sattva'])}", size=12),
-                                                ft.Text(f"Rajas: {int(patient['prakruti_rajas'])}", size=12),
-                                                ft.Text(f"Tamas: {int(patient['prakruti_tamas'])}", size=12),
-                                            ])
-                                        ], alignment=ft.MainAxisAlignment.SPACE_EVENLY, vertical_alignment=ft.CrossAxisAlignment.START)
-                                    ])
-                                ),
-                                ft.Container(height=15),
-                                
-                                # SECCION CONSULTAS
-                                ft.Row([
-                                    ft.Text("Historial de Consultas", size=16, weight="bold", color=ft.Colors.TEAL_900),
-                                    ft.IconButton(ft.Icons.ADD_CIRCLE, icon_color=ft.Colors.DEEP_ORANGE, tooltip="Nueva Consulta", on_click=lambda _: page.go(f"/consulta/{patient_id}"))
-                                ], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
-                                
-                                # LISTA SCROLLEABLE
-                                ft.Column(history_tiles, spacing=10, scroll=ft.ScrollMode.AUTO, expand=False), # Expand false para q use el scroll del view o del container
-                                ft.Container(height=20),
-                                ft.OutlinedButton("Volver a Lista de Pacientes", icon=ft.Icons.ARROW_BACK, on_click=lambda _: page.go("/pacientes"), width=float('inf'))
-                            ] )
-                        )
-                    ],
-                    bgcolor=ft.Colors.WHITE,
-                    scroll=ft.ScrollMode.AUTO
-                )
-            )
-
-        # ---------------------------------------------------------
-        # 5. NUEVA CONSULTA
-        # ---------------------------------------------------------
-        elif troute.match("/consulta/:paciente_id"):
-             patient_id = troute.paciente_id
-             
-             # Inputs
-             txt_fecha = ft.TextField(label="Fecha", value=datetime.date.today().strftime("%Y-%m-%d"), border_color=ft.Colors.TEAL)
-             txt_motivo = ft.TextField(label="Motivo de Consulta", border_color=ft.Colors.TEAL)
-             txt_sintomas = ft.TextField(label="Síntomas", multiline=True, min_lines=2, border_color=ft.Colors.TEAL)
-             
-             # Sliders Vikruti (Estado Actual)
-             k_vik_v = create_compact_slider("Vata (Vikruti)", ft.Colors.BLUE, 0)
-             k_vik_p = create_compact_slider("Pitta (Vikruti)", ft.Colors.RED, 0)
-             k_vik_k = create_compact_slider("Kapha (Vikruti)", ft.Colors.GREEN, 0)
-
-             # Sliders Gunas (Estado Mental)
-             k_gun_s = create_compact_slider("Sattva (Equilibrio)", ft.Colors.AMBER, 5)
-             k_gun_r = create_compact_slider("Rajas (Pasión)", ft.Colors.ORANGE, 5)
-             k_gun_t = create_compact_slider("Tamas (Inercia)", ft.Colors.GREY, 5)
-
-             txt_tratamiento = ft.TextField(label="Tratamiento / Sugerencias", multiline=True, min_lines=4, border_color=ft.Colors.TEAL)
-             txt_detalle = ft.TextField(label="Detalles Privados / Notas extra", multiline=True, min_lines=2, border_color=ft.Colors.TEAL)
-             
-             def guardar_cons(e):
-                 if not txt_motivo.value:
-                     txt_motivo.error_text = "Requerido"
-                     txt_motivo.update()
-                     return
-
-                 data = {
-                    "paciente_id": patient_id,
-                    "fecha": txt_fecha.value,
-                    "motivo": txt_motivo.value,
-                    "sintomas": txt_sintomas.value,
-                    "vikruti_vata": k_vik_v.controls[1].value,
-                    "vikruti_pitta": k_vik_p.controls[1].value,
-                    "vikruti_kapha": k_vik_k.controls[1].value,
-                    "guna_sattva": k_gun_s.controls[1].value,
-                    "guna_rajas": k_gun_r.controls[1].value,
-                    "guna_tamas": k_gun_t.controls[1].value,
-                    "tratamiento": txt_tratamiento.value,
-                    "detalle": txt_detalle.value
-                }
-                 db.save_consultation(data)
-                 page.go(f"/paciente/{patient_id}")
-
-             page.views.append(
-                ft.View(
-                    f"/consulta/{patient_id}",
-                    [
-                        ft.AppBar(title=ft.Text("Registrar Consulta"), bgcolor=ft.Colors.TEAL_700, color=ft.Colors.WHITE),
-                        ft.Container(
-                            padding=20,
-                            content=ft.Column([
-                                txt_fecha,
-                                txt_motivo,
-                                txt_sintomas,
-                                ft.Divider(),
-                                ft.Text("Vikruti (Desequilibrio Actual)", weight="bold"),
-                                ft.Row([k_vik_v, k_vik_p, k_vik_k], alignment=ft.MainAxisAlignment.SPACE_EVENLY),
-                                ft.Divider(),
-                                ft.Text("Estado Mental (Gunas)", weight="bold"),
-                                ft.Row([k_gun_s, k_gun_r, k_gun_t], alignment=ft.MainAxisAlignment.SPACE_EVENLY),
-                                ft.Divider(),
-                                txt_tratamiento,
-                                txt_detalle,
-                                ft.Container(height=20),
-                                ft.ElevatedButton("Guardar Consulta", icon=ft.Icons.SAVE, bgcolor=ft.Colors.TEAL_700, color=ft.Colors.WHITE, width=float('inf'), height=50, on_click=guardar_cons)
-                            ] )
-                        )
-                    ],
-                    bgcolor=ft.Colors.WHITE,
-                    scroll=ft.ScrollMode.AUTO
-                )
-             )
-
-        page.update()
-
-    def view_pop(view):
-        page.views.pop()
-        top_view = page.views[-1]
-        page.go(top_view.route)
+    page.padding = 0
 
-    page.on_route_change = route_change
-    page.on_view_pop = view_pop
+    app = App(page, shared.db_file if shared else DB_FILE, started, shared)
+    page.overlay.extend([app.import_picker, app.export_picker, app.backup_picker])
+    page.on_route_change = app.route_change
+    page.on_view_pop = app.view_pop
+    page.on_keyboard_event = app.on_keyboard
+    page.on_close = app.close
+    # La portada se pinta ya; la base (V5) se abre y migra mientras tanto
     page.go("/")
+    page.run_thread(app.open_database)
+    return app
 
-ft.app(target=main)
+if __name__ == "__main__":
+    ft.app(target=main)
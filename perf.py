@@ -0,0 +1,99 @@
+import json
+import os
+import threading
+import time
+import weakref
+from collections import deque
+from contextlib import contextmanager
+
+# Muestras recientes que se conservan (las más antiguas se descartan)
+RING_SIZE = 2000
+# Activa la instrumentación desde el arranque
+ENV_FLAG = "AYURVEDA_PERF"
+
+
+class PerfMonitor:
+    """Instrumentación opcional de rendimiento.
+
+    Guarda en un buffer circular muestras de tiempos de construcción de
+    vistas (separando el tiempo en base de datos del de los controles), de
+    page.update() y de cada consulta SQL. Desactivada, las bases no tienen
+    trazador y las rutas solo comprueban `enabled`, así que el coste es
+    prácticamente nulo.
+    """
+
+    def __init__(self, size=RING_SIZE, enabled=False):
+        self.enabled = enabled
+        self.samples = deque(maxlen=size)
+        self._local = threading.local()
+        self._dbs = weakref.WeakSet()
+
+    def attach(self, db):
+        """Registra una AyurvedaDB para trazar sus consultas mientras esté activa."""
+        self._dbs.add(db)
+        db.tracer = self.trace_sql if self.enabled else None
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        for db in self._dbs:
+            db.tracer = self.trace_sql if enabled else None
+
+    def clear(self):
+        self.samples.clear()
+
+    def record(self, kind, name, seconds, **extra):
+        self.samples.append(dict(tipo=kind, nombre=name, ms=seconds * 1000, t=time.time(), **extra))
+
+    def trace_sql(self, sql, seconds, rows):
+        self.record("sql", " ".join(sql.split())[:200], seconds, filas=rows)
+        # Tiempo en base de datos de la vista que se esté construyendo en este hilo
+        self._local.db_seconds = getattr(self._local, "db_seconds", 0.0) + seconds
+
+    @contextmanager
+    def measure_build(self, route):
+        """Mide la construcción de una vista, separando el tiempo en base de datos."""
+        if not self.enabled:
+            yield
+            return
+        self._local.db_seconds = 0.0
+        start = time.perf_counter()
+        yield
+        total = time.perf_counter() - start
+        db_seconds = self._local.db_seconds
+        self.record("ruta", route, total, db_ms=db_seconds * 1000, controles_ms=(total - db_seconds) * 1000)
+
+    @contextmanager
+    def measure(self, kind, name):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        yield
+        self.record(kind, name, time.perf_counter() - start)
+
+    def summary(self):
+        """p50/p95 por tipo y nombre sobre las muestras del buffer."""
+        groups = {}
+        for s in list(self.samples):
+            groups.setdefault(s["tipo"], {}).setdefault(s["nombre"], []).append(s["ms"])
+        result = {}
+        for kind, names in groups.items():
+            result[kind] = {}
+            for name, values in names.items():
+                values.sort()
+                result[kind][name] = {
+                    "n": len(values),
+                    "p50_ms": round(values[len(values) // 2], 3),
+                    "p95_ms": round(values[min(len(values) - 1, int(len(values) * 0.95))], 3),
+                }
+        return result
+
+    def dump(self, path):
+        """Escribe el resumen y las muestras en un archivo JSON."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"resumen": self.summary(), "muestras": list(self.samples)}, f, indent=2, ensure_ascii=False)
+        return path
+
+
+# Monitor único de la app
+monitor = PerfMonitor(enabled=os.environ.get(ENV_FLAG) == "1")
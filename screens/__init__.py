@@ -0,0 +1,49 @@
+"""Pantallas de la app.
+
+Cada módulo expone build(app, troute), que devuelve la ft.View de su ruta (o
+None si redirige). Los módulos se importan la primera vez que se visita su
+ruta, así el arranque solo carga lo necesario para pintar la portada.
+"""
+import importlib
+
+import flet as ft
+
+# Plantilla de ruta -> módulo que construye su vista
+SCREENS = {
+    "/": "home",
+    "/pacientes": "patients",
+    "/nuevo_paciente": "patient_form",
+    "/editar_paciente/:id": "patient_form",
+    "/paciente/:id": "dashboard",
+    "/consulta/:paciente_id": "consultation_form",
+    "/tendencias": "trends",
+    "/tendencias/:id": "trends",
+    "/buscar_consultas": "consultation_search",
+    "/debug/perf": "perf_debug",
+}
+# Rutas que no leen la base: se construyen sin esperar a que esté abierta
+NO_DB_ROUTES = ["/", "/debug/perf"]
+
+
+def route_name(route):
+    """Plantilla a la que corresponde `route` (p. ej. /paciente/:id)."""
+    troute = ft.TemplateRoute(route)
+    return next((t for t in SCREENS if troute.match(t)), route)
+
+
+def needs_db(route):
+    return route_name(route) not in NO_DB_ROUTES
+
+
+def load(template):
+    """Importa (la primera vez) el módulo de la pantalla de `template`."""
+    return importlib.import_module(f"{__name__}.{SCREENS[template]}")
+
+
+def build_view(app, route):
+    """Construye la vista de `route`. Devuelve None si la ruta redirige a otra o no existe."""
+    troute = ft.TemplateRoute(route)
+    for template in SCREENS:
+        if troute.match(template):
+            return load(template).build(app, troute)
+    return None
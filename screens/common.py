@@ -0,0 +1,187 @@
+"""Controles y utilidades compartidos por varias pantallas."""
+import datetime
+import threading
+
+import flet as ft
+
+# Espera tras la última tecla antes de lanzar la búsqueda (segundos)
+SEARCH_DEBOUNCE = 0.25
+
+
+def calculate_age_str(birth_date_str):
+    if not birth_date_str: return "N/A"
+    try:
+        birth_date = datetime.datetime.strptime(birth_date_str, "%Y-%m-%d").date()
+        today = datetime.date.today()
+        age = today.year - birth_date.year - ((today.month, today.day) < (birth_date.month, birth_date.day))
+        return str(age)
+    except:
+        return "?"
+
+
+def create_compact_slider(label, color, initial_value=5):
+    """Crea un control de columna con Label y Slider."""
+    # Slider más compacto (height=20)
+    slider = ft.Slider(min=0, max=10, divisions=10, value=initial_value, label="{value}", active_color=color, height=20)
+    return ft.Column([
+        ft.Text(label, size=11, color=color, weight="bold"),
+        slider
+    ], spacing=0, expand=True)
+
+
+def patient_card(page, p):
+    """Tarjeta de un paciente para el listado."""
+    age_str = calculate_age_str(p['fecha_nacimiento'])
+    return ft.Card(
+        content=ft.ListTile(
+            leading=ft.CircleAvatar(
+                content=ft.Text(p['nombre'][0].upper(), weight="bold"), 
+                bgcolor=ft.Colors.TEAL_100, 
+                color=ft.Colors.TEAL_900
+            ),
+            title=ft.Text(p['nombre'], weight="bold", size=16),
+            subtitle=ft.Text(f"Edad: {age_str} | Tel: {p['telefono'] or '-'}", size=12),
+            trailing=ft.IconButton(ft.Icons.EDIT, icon_color=ft.Colors.TEAL_600, on_click=lambda e, pid=p['id']: page.go(f"/editar_paciente/{pid}")),
+            on_click=lambda e, pid=p['id']: page.go(f"/paciente/{pid}")
+        ),
+        elevation=2,
+        color=ft.Colors.WHITE,
+        margin=ft.margin.only(bottom=8),
+        data=p
+    )
+
+
+def sort_key(p):
+    """Misma ordenación que el listado de la base (nombre COLLATE NOCASE, id)."""
+    return (p['nombre'].encode().lower(), int(p['id']))
+
+
+def history_order(c):
+    """Clave del historial de la base (fecha descendente, sin fecha al final, e id descendente), de mayor a menor."""
+    return (c['fecha'] is not None, c['fecha'] or "", int(c['id']))
+
+
+def consultation_tile(c, load_detail=None):
+    """Resumen de una consulta para el historial del paciente.
+
+    El historial trae los textos recortados: al pulsar la consulta se despliega
+    completa, leída con `load_detail(id)` la primera vez.
+    """
+    sintomas = ft.Text(f"Síntomas: {c.get('sintomas', '-')}", size=12, italic=True, color=ft.Colors.GREY_700, max_lines=2, overflow=ft.TextOverflow.ELLIPSIS)
+    tratamiento = ft.Text(f"Tratamiento: {c.get('tratamiento', '')}", size=12, max_lines=2, overflow=ft.TextOverflow.ELLIPSIS)
+    detail = ft.Column(spacing=2, visible=False)
+    icon = ft.Icon(ft.Icons.INFO_OUTLINE, size=16, color=ft.Colors.GREY)
+
+    def toggle(e):
+        if not detail.controls:
+            full = load_detail(c['id']) if load_detail and c.get('id') else c
+            if full is None:
+                return
+            sintomas.value = f"Síntomas: {full.get('sintomas') or '-'}"
+            tratamiento.value = f"Tratamiento: {full.get('tratamiento') or ''}"
+            detail.controls = [
+                ft.Text(f"Gunas: S{int(full.get('guna_sattva') or 0)} R{int(full.get('guna_rajas') or 0)} T{int(full.get('guna_tamas') or 0)}", size=11, color=ft.Colors.ORANGE_900),
+            ]
+            if full.get('detalle'):
+                detail.controls.append(ft.Text(f"Detalle: {full['detalle']}", size=12, color=ft.Colors.BROWN_700))
+        detail.visible = not detail.visible
+        sintomas.max_lines = tratamiento.max_lines = None if detail.visible else 2
+        icon.name = ft.Icons.EXPAND_LESS if detail.visible else ft.Icons.INFO_OUTLINE
+        tile.update()
+
+    tile = ft.Container(
+       bgcolor=ft.Colors.WHITE,
+       border=ft.border.all(1, ft.Colors.GREY_300),
+       border_radius=8,
+       padding=10,
+       on_click=toggle,
+       content=ft.Column([
+           ft.Row([
+               ft.Icon(ft.Icons.CALENDAR_MONTH, size=16, color=ft.Colors.TEAL),
+               ft.Text(f"{c['fecha']}", weight="bold"),
+               ft.Container(expand=True),
+               icon
+           ]),
+           ft.Text(f"Motivo: {c['motivo']}", size=13, weight="w500"),
+           sintomas,
+           ft.Text(f"Vikruti: V{int(c.get('vikruti_vata',0))} P{int(c.get('vikruti_pitta',0))} K{int(c.get('vikruti_kapha',0))}", size=11, color=ft.Colors.TEAL),
+           ft.Divider(height=5),
+           tratamiento,
+           detail
+       ]),
+       data=c
+    )
+    return tile
+
+
+def debounce_search(field, run, clear, delay=SEARCH_DEBOUNCE):
+    """Buscador que espera `delay` segundos tras la última tecla de `field`.
+
+    Llama en un hilo aparte a `run(texto, is_current)`; `is_current()` pasa a
+    ser falso en cuanto se escribe otra tecla, y entonces el resultado ya no
+    debe pintarse. Con el campo vacío llama a `clear()` en el acto.
+    """
+    # `gen` se incrementa con cada tecla: una búsqueda cuyo gen ya no coincide es obsoleta
+    state = {"gen": 0, "timer": None}
+
+    def on_change(e):
+        state["gen"] += 1
+        gen = state["gen"]
+        if state["timer"]:
+            state["timer"].cancel()
+        text = field.value.strip()
+        if not text:
+            clear()
+            return
+        state["timer"] = threading.Timer(delay, run, args=(text, lambda: gen == state["gen"]))
+        state["timer"].start()
+
+    field.on_change = on_change
+
+
+def autosave_form(app, route, fields):
+    """Autoguardado del formulario de `route`; `fields` es {campo: control con .value}.
+
+    Si hay un borrador de esa ruta lo vuelca en los controles. Cada cambio
+    se anota en app.drafts (en memoria; se escribe cada pocos segundos).
+    Devuelve el aviso de borrador recuperado, con un botón para descartarlo.
+    """
+    page = app.page
+    defaults = {f: c.value for f, c in fields.items()}
+    draft = app.db.get_draft(app.drafts.device, route)
+    for f, value in (draft or {}).items():
+        if f in fields:
+            fields[f].value = value
+
+    def on_field_change(e):
+        app.drafts.update(route, {f: c.value for f, c in fields.items()})
+
+    def chain(previous):
+        def handler(e):
+            if previous:
+                previous(e)
+            on_field_change(e)
+        return handler
+
+    for control in fields.values():
+        control.on_change = chain(control.on_change)
+
+    def discard(e):
+        for f, value in defaults.items():
+            fields[f].value = value
+        app.drafts.discard(route)
+        banner.visible = False
+        page.update()
+
+    banner = ft.Container(
+        visible=draft is not None,
+        bgcolor=ft.Colors.AMBER_50,
+        border_radius=8,
+        padding=ft.padding.symmetric(horizontal=10, vertical=4),
+        content=ft.Row([
+            ft.Icon(ft.Icons.RESTORE, size=18, color=ft.Colors.AMBER_900),
+            ft.Text("Borrador recuperado sin guardar", size=13, color=ft.Colors.AMBER_900, expand=True),
+            ft.TextButton("Descartar", on_click=discard),
+        ])
+    )
+    return banner
@@ -0,0 +1,88 @@
+import datetime
+
+import flet as ft
+
+from screens.common import autosave_form, create_compact_slider
+
+
+def build(app, troute):
+    """Formulario de nueva consulta."""
+    page, worker = app.page, app.worker
+    patient_id = troute.paciente_id
+    route = f"/consulta/{patient_id}"
+
+    # Inputs
+    txt_fecha = ft.TextField(label="Fecha", value=datetime.date.today().strftime("%Y-%m-%d"), border_color=ft.Colors.TEAL)
+    txt_motivo = ft.TextField(label="Motivo de Consulta", border_color=ft.Colors.TEAL)
+    txt_sintomas = ft.TextField(label="Síntomas", multiline=True, min_lines=2, border_color=ft.Colors.TEAL)
+
+    # Sliders Vikruti (Estado Actual)
+    k_vik_v = create_compact_slider("Vata (Vikruti)", ft.Colors.BLUE, 0)
+    k_vik_p = create_compact_slider("Pitta (Vikruti)", ft.Colors.RED, 0)
+    k_vik_k = create_compact_slider("Kapha (Vikruti)", ft.Colors.GREEN, 0)
+
+    # Sliders Gunas (Estado Mental)
+    k_gun_s = create_compact_slider("Sattva (Equilibrio)", ft.Colors.AMBER, 5)
+    k_gun_r = create_compact_slider("Rajas (Pasión)", ft.Colors.ORANGE, 5)
+    k_gun_t = create_compact_slider("Tamas (Inercia)", ft.Colors.GREY, 5)
+
+    txt_tratamiento = ft.TextField(label="Tratamiento / Sugerencias", multiline=True, min_lines=4, border_color=ft.Colors.TEAL)
+    txt_detalle = ft.TextField(label="Detalles Privados / Notas extra", multiline=True, min_lines=2, border_color=ft.Colors.TEAL)
+
+    # Campo de la consulta -> control del que se lee (y en el que se restaura el borrador)
+    fields = {
+        "fecha": txt_fecha,
+        "motivo": txt_motivo,
+        "sintomas": txt_sintomas,
+        "vikruti_vata": k_vik_v.controls[1],
+        "vikruti_pitta": k_vik_p.controls[1],
+        "vikruti_kapha": k_vik_k.controls[1],
+        "guna_sattva": k_gun_s.controls[1],
+        "guna_rajas": k_gun_r.controls[1],
+        "guna_tamas": k_gun_t.controls[1],
+        "tratamiento": txt_tratamiento,
+        "detalle": txt_detalle,
+    }
+    draft_banner = autosave_form(app, route, fields)
+
+    def guardar_cons(e):
+        if not txt_motivo.value:
+            txt_motivo.error_text = "Requerido"
+            txt_motivo.update()
+            return
+
+        data = dict({f: c.value for f, c in fields.items()}, paciente_id=patient_id)
+        future = worker.save_consultation(data)
+        app.drafts.discard_when_saved(route, future)
+        # La consulta entra en el historial con su id cuando se confirma; si falla no queda nada que deshacer
+        future.add_done_callback(lambda f: app.on_write_done(f, lambda cid: app.on_consultation_saved(data, cid)))
+        page.go(f"/paciente/{patient_id}")
+
+    return ft.View(
+        route,
+        [
+            ft.AppBar(title=ft.Text("Registrar Consulta"), bgcolor=ft.Colors.TEAL_700, color=ft.Colors.WHITE),
+            ft.Container(
+                padding=20,
+                content=ft.Column([
+                    draft_banner,
+                    txt_fecha,
+                    txt_motivo,
+                    txt_sintomas,
+                    ft.Divider(),
+                    ft.Text("Vikruti (Desequilibrio Actual)", weight="bold"),
+                    ft.Row([k_vik_v, k_vik_p, k_vik_k], alignment=ft.MainAxisAlignment.SPACE_EVENLY),
+                    ft.Divider(),
+                    ft.Text("Estado Mental (Gunas)", weight="bold"),
+                    ft.Row([k_gun_s, k_gun_r, k_gun_t], alignment=ft.MainAxisAlignment.SPACE_EVENLY),
+                    ft.Divider(),
+                    txt_tratamiento,
+                    txt_detalle,
+                    ft.Container(height=20),
+                    ft.ElevatedButton("Guardar Consulta", icon=ft.Icons.SAVE, bgcolor=ft.Colors.TEAL_700, color=ft.Colors.WHITE, width=float('inf'), height=50, on_click=guardar_cons)
+                ] )
+            )
+        ],
+        bgcolor=ft.Colors.WHITE,
+        scroll=ft.ScrollMode.AUTO
+    )
@@ -0,0 +1,121 @@
+import flet as ft
+
+from database import HIGHLIGHT_END, HIGHLIGHT_START
+from screens.common import debounce_search
+
+
+def highlighted_text(fragment, **kwargs):
+    """Texto con las coincidencias (entre HIGHLIGHT_START y HIGHLIGHT_END) resaltadas."""
+    spans = []
+    for i, part in enumerate((fragment or "").split(HIGHLIGHT_START)):
+        match, _, rest = part.partition(HIGHLIGHT_END) if i else ("", "", part)
+        if match:
+            spans.append(ft.TextSpan(match, ft.TextStyle(weight="bold", bgcolor=ft.Colors.AMBER_100)))
+        if rest:
+            spans.append(ft.TextSpan(rest))
+    return ft.Text(spans=spans, **kwargs)
+
+
+def result_card(page, c):
+    """Tarjeta de una consulta encontrada; lleva al historial de su paciente."""
+    return ft.Card(
+        content=ft.ListTile(
+            leading=ft.Icon(ft.Icons.EVENT_NOTE, color=ft.Colors.TEAL_600),
+            title=ft.Text(f"{c['nombre']} · {c['fecha'] or '-'}", weight="bold", size=15),
+            subtitle=ft.Column([
+                ft.Text(c['motivo'] or "Sin motivo", size=13, color=ft.Colors.TEAL_900),
+                highlighted_text(c['sintomas'], size=12, color=ft.Colors.GREY_800),
+                highlighted_text(c['tratamiento'], size=12, color=ft.Colors.GREY_800),
+            ], spacing=2),
+            on_click=lambda e, pid=c['paciente_id']: page.go(f"/paciente/{pid}")
+        ),
+        elevation=2,
+        color=ft.Colors.WHITE,
+        margin=ft.margin.only(bottom=8),
+        data=c
+    )
+
+
+def build(app, troute):
+    """Búsqueda de texto en motivo, síntomas y tratamiento de todas las consultas."""
+    page, worker = app.page, app.worker
+    results = ft.ListView(expand=True, spacing=5)
+    # Búsqueda en pantalla: su texto, el offset de la página siguiente y si sigue siendo la actual
+    search_state = {"text": "", "offset": None, "is_current": None}
+
+    def message(text):
+        return ft.Container(
+            content=ft.Text(text, italic=True, color=ft.Colors.GREY_700),
+            alignment=ft.alignment.center,
+            padding=40
+        )
+
+    more_button = ft.TextButton("Más resultados", icon=ft.Icons.EXPAND_MORE, style=ft.ButtonStyle(color=ft.Colors.TEAL_800))
+
+    def load_page():
+        is_current = search_state["is_current"]
+        found, next_offset = worker.read("search_consultations", search_state["text"], search_state["offset"] or 0).result()
+        if not is_current():
+            return
+        controls = results.controls
+        if more_button in controls:
+            controls.remove(more_button)
+        if not search_state["offset"]:
+            controls.clear()
+            if not found:
+                controls.append(message("Sin resultados."))
+        controls.extend(result_card(page, c) for c in found)
+        search_state["offset"] = next_offset
+        if next_offset is not None:
+            controls.append(more_button)
+        page.update()
+
+    def on_more(e):
+        more_button.disabled = True
+        page.update()
+        load_page()
+        more_button.disabled = False
+
+    more_button.on_click = on_more
+
+    def run_search(text, is_current):
+        search_state.update(text=text, offset=None, is_current=is_current)
+        load_page()
+
+    def clear_search():
+        results.controls = [message("Escribe síntomas, tratamientos o motivos de consulta.")]
+        page.update()
+
+    txt_buscar = ft.TextField(
+        hint_text="Buscar en consultas (p. ej. insomnio ashwagandha)",
+        prefix_icon=ft.Icons.MANAGE_SEARCH,
+        text_size=14,
+        border_color=ft.Colors.TEAL,
+        bgcolor=ft.Colors.WHITE,
+        autofocus=True
+    )
+    debounce_search(txt_buscar, run_search, clear_search)
+    results.controls.append(message("Escribe síntomas, tratamientos o motivos de consulta."))
+
+    return ft.View(
+        troute.route,
+        [
+            ft.AppBar(
+                leading=ft.IconButton(ft.Icons.ARROW_BACK, on_click=lambda _: page.go("/")),
+                title=ft.Text("Buscar en Consultas"),
+                bgcolor=ft.Colors.TEAL_700,
+                color=ft.Colors.WHITE
+            ),
+            ft.Container(
+                padding=15,
+                content=ft.Column([txt_buscar, results], expand=True),
+                gradient=ft.LinearGradient(
+                    begin=ft.alignment.top_center,
+                    end=ft.alignment.bottom_center,
+                    colors=[ft.Colors.ORANGE_50, ft.Colors.WHITE]
+                ),
+                expand=True
+            )
+        ],
+        padding=0
+    )
@@ -0,0 +1,160 @@
+import flet as ft
+
+from database import PAGE_SIZE
+from screens.common import calculate_age_str, consultation_tile
+
+
+def build(app, troute):
+    """Ficha del paciente con su historial de consultas. Devuelve None si no existe."""
+    page, db = app.page, app.db
+    patient_id = troute.id
+    patient = db.get_patient(patient_id)
+    if not patient:
+        page.go("/pacientes")
+        return
+
+    age = calculate_age_str(patient['fecha_nacimiento'])
+
+    # --- Cards de Info ---
+    def info_row(icon, label, value):
+        return ft.Row([ft.Icon(icon, size=16, color=ft.Colors.TEAL), ft.Text(f"{label}: ", weight="bold"), ft.Text(value)], spacing=5)
+
+    # --- Lista Historial (se carga por páginas, después de mostrar la cabecera) ---
+    history_header = ft.Row([
+        ft.Text("Historial de Consultas", size=16, weight="bold", color=ft.Colors.TEAL_900),
+        ft.IconButton(ft.Icons.ADD_CIRCLE, icon_color=ft.Colors.DEEP_ORANGE, tooltip="Nueva Consulta", on_click=lambda _: page.go(f"/consulta/{patient_id}"))
+    ], alignment=ft.MainAxisAlignment.SPACE_BETWEEN)
+    history_loading = ft.Container(content=ft.ProgressRing(width=20, height=20), alignment=ft.alignment.center, padding=10)
+    history_list = ft.ListView(expand=True, spacing=10, on_scroll_interval=100)
+    history = {
+        "list": history_list, "header": history_header, "loading": history_loading,
+        "cursor": None, "done": False, "busy": False,
+    }
+    app.history_state.put(int(patient_id), history)
+
+    def load_history_page():
+        if history["done"] or history["busy"]:
+            return
+        history["busy"] = True
+        consultas, history["cursor"] = db.get_consultations_page(patient_id, history["cursor"], PAGE_SIZE)
+        history["done"] = history["cursor"] is None
+        index = history_list.controls.index(history_loading)
+        tiles = [consultation_tile(c, db.get_consultation) for c in consultas]
+        if not tiles and index == history_list.controls.index(history_header) + 1:
+            tiles.append(ft.Text("No hay consultas registradas.", italic=True))
+        history_list.controls[index:index] = tiles
+        history_loading.visible = not history["done"]
+        history["busy"] = False
+        history_list.update()
+
+    def on_history_scroll(e: ft.OnScrollEvent):
+        # Cargar consultas más antiguas al acercarse al final
+        if e.pixels >= e.max_scroll_extent - 300 and not history["done"]:
+            load_history_page()
+
+    history_list.on_scroll = on_history_scroll
+    app.after_show.append(load_history_page)
+
+    # --- Pacientes con constitución similar (índice en memoria, ver similarity.py) ---
+    def similar_tile(p, distance):
+        return ft.ListTile(
+            dense=True,
+            leading=ft.CircleAvatar(content=ft.Text(p['nombre'][0].upper()), bgcolor=ft.Colors.ORANGE_100, color=ft.Colors.BROWN_800),
+            title=ft.Text(p['nombre'], size=13, weight="w500"),
+            subtitle=ft.Text(
+                f"V{int(p['prakruti_vata'])} P{int(p['prakruti_pitta'])} K{int(p['prakruti_kapha'])} · "
+                f"S{int(p['prakruti_sattva'])} R{int(p['prakruti_rajas'])} T{int(p['prakruti_tamas'])}",
+                size=11, color=ft.Colors.GREY_700
+            ),
+            trailing=ft.Text(f"{distance:.1f}", size=11, color=ft.Colors.TEAL),
+            on_click=lambda e, pid=p['id']: page.go(f"/paciente/{pid}")
+        )
+
+    similar_section = ft.Column([
+        ft.Text("Constitución Similar", size=16, weight="bold", color=ft.Colors.TEAL_900),
+        ft.Container(content=ft.ProgressRing(width=20, height=20), alignment=ft.alignment.center, padding=10),
+    ], spacing=0)
+
+    def load_similar():
+        similar = db.similar_patients(patient_id)
+        similar_section.controls[1:] = [similar_tile(p, d) for p, d in similar] or [
+            ft.Text("No hay otros pacientes registrados.", italic=True)
+        ]
+        similar_section.update()
+
+    app.after_show.append(load_similar)
+
+    history_list.controls = [
+        # HEADER INFO
+        ft.Container(
+            padding=15,
+            bgcolor=ft.Colors.TEAL_50,
+            border_radius=10,
+            content=ft.Column([
+                ft.Row([
+                    ft.Icon(ft.Icons.PERSON, size=40, color=ft.Colors.TEAL_800),
+                    ft.Column([
+                        ft.Text(patient['nombre'], size=18, weight="bold", color=ft.Colors.TEAL_900),
+                        ft.Text(f"Edad: {age} años", size=12)
+                    ])
+                ]),
+                ft.Divider(color=ft.Colors.TEAL_200),
+                info_row(ft.Icons.PHONE, "Tel", patient.get('telefono', '-')),
+                info_row(ft.Icons.HOME, "Dom", patient.get('domicilio', '-')),
+                ft.Container(height=5),
+                ft.Text("Antecedentes:", weight="bold", size=12),
+                ft.Text(patient.get('nota', '-'), size=12, italic=True),
+                ft.Container(height=5),
+                ft.Container(height=5),
+                # Doshas y Gunas Explicitos
+                ft.Row([
+                    ft.Column([
+                        ft.Text("Prakruti (Doshas)", size=12, weight="bold", color=ft.Colors.TEAL_900),
+                        ft.Text(f"Vata: {int(patient['prakruti_vata'])}", size=12),
+                        ft.Text(f"Pitta: {int(patient['prakruti_pitta'])}", size=12),
+                        ft.Text(f"Kapha: {int(patient['prakruti_kapha'])}", size=12),
+                    ]),
+                    ft.VerticalDivider(width=20, color=ft.Colors.GREY_300),
+                    ft.Column([
+                        ft.Text("Gunas (Mente)", size=12, weight="bold", color=ft.Colors.ORANGE_900),
+                        ft.Text(f"Sattva: {int(patient['prakruti_sattva'])}", size=12),
+                        ft.Text(f"Rajas: {int(patient['prakruti_rajas'])}", size=12),
+                        ft.Text(f"Tamas: {int(patient['prakruti_tamas'])}", size=12),
+                    ])
+                ], alignment=ft.MainAxisAlignment.SPACE_EVENLY, vertical_alignment=ft.CrossAxisAlignment.START)
+            ])
+        ),
+        ft.Container(height=15),
+        similar_section,
+        ft.Container(height=15),
+
+        # SECCION CONSULTAS
+        history_header,
+
+        # LISTA SCROLLEABLE (las consultas se insertan antes del indicador de carga)
+        history_loading,
+        ft.Container(height=20),
+        ft.OutlinedButton("Volver a Lista de Pacientes", icon=ft.Icons.ARROW_BACK, on_click=lambda _: page.go("/pacientes"), width=float('inf'))
+    ]
+
+    return ft.View(
+        f"/paciente/{patient_id}",
+        [
+            ft.AppBar(
+                leading=ft.IconButton(ft.Icons.ARROW_BACK, on_click=lambda _: page.go("/pacientes"), tooltip="Volver a Lista"),
+                title=ft.Text(patient['nombre']), 
+                bgcolor=ft.Colors.TEAL_700, 
+                color=ft.Colors.WHITE, 
+                actions=[
+                    ft.IconButton(ft.Icons.INSIGHTS, tooltip="Tendencias", on_click=lambda _: page.go(f"/tendencias/{patient_id}")),
+                ft.IconButton(ft.Icons.EDIT, tooltip="Editar Ficha", on_click=lambda _: page.go(f"/editar_paciente/{patient_id}"))
+                ]
+            ),
+            ft.Container(
+                padding=15,
+                expand=True,
+                content=history_list
+            )
+        ],
+        bgcolor=ft.Colors.WHITE
+    )
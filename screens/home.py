@@ -0,0 +1,64 @@
+import flet as ft
+
+
+def build(app, troute):
+    """Portada. No lee la base de datos: se pinta mientras esta se abre."""
+    page = app.page
+    return ft.View(
+        "/",
+        [
+            ft.AppBar(
+                title=ft.Text("Ayurveda Manager"), 
+                center_title=True,
+                bgcolor=ft.Colors.TEAL_700, 
+                color=ft.Colors.WHITE,
+                elevation=4
+            ),
+            ft.Container(
+                gradient=ft.LinearGradient(
+                    begin=ft.alignment.top_center,
+                    end=ft.alignment.bottom_center,
+                    colors=[ft.Colors.ORANGE_50, ft.Colors.ORANGE_100],
+                ),
+                padding=20,
+                alignment=ft.alignment.center,
+                content=ft.Column([
+                    ft.Icon(ft.Icons.SPA, size=100, color=ft.Colors.TEAL_600),
+                    ft.Text("Gestión de Pacientes", size=24, weight="bold", color=ft.Colors.BROWN_800),
+                    ft.Text("Ayurveda y Coaching", size=16, color=ft.Colors.BROWN_600),
+                    ft.Container(height=40),
+                    ft.ElevatedButton(
+                        content=ft.Container(
+                            content=ft.Row([
+                                ft.Icon(ft.Icons.PEOPLE, size=30, color=ft.Colors.WHITE),
+                                ft.Text("VER PACIENTES", size=18, weight="bold", color=ft.Colors.WHITE),
+                            ], alignment=ft.MainAxisAlignment.CENTER),
+                            padding=ft.padding.symmetric(vertical=15, horizontal=20)
+                        ),
+                        style=ft.ButtonStyle(
+                            bgcolor=ft.Colors.TEAL_600,
+                            shape=ft.RoundedRectangleBorder(radius=10),
+                            elevation=5
+                        ),
+                        on_click=lambda _: page.go("/pacientes")
+                    ),
+                    ft.Container(height=10),
+                    ft.TextButton(
+                        "Tendencias de la clínica",
+                        icon=ft.Icons.INSIGHTS,
+                        style=ft.ButtonStyle(color=ft.Colors.TEAL_800),
+                        on_click=lambda _: page.go("/tendencias")
+                    ),
+                    ft.TextButton(
+                        "Buscar en consultas",
+                        icon=ft.Icons.MANAGE_SEARCH,
+                        style=ft.ButtonStyle(color=ft.Colors.TEAL_800),
+                        on_click=lambda _: page.go("/buscar_consultas")
+                    )
+                ], horizontal_alignment=ft.CrossAxisAlignment.CENTER, alignment=ft.MainAxisAlignment.CENTER),
+                expand=True
+            )
+        ],
+        padding=0,
+        scroll=ft.ScrollMode.AUTO
+    )
@@ -0,0 +1,131 @@
+import flet as ft
+
+from screens.common import autosave_form, calculate_age_str, create_compact_slider
+
+
+def build(app, troute):
+    """Formulario de paciente nuevo o de edición. Devuelve None si el paciente no existe."""
+    page, db, worker = app.page, app.db, app.worker
+    route = troute.route
+    is_edit = "/editar_paciente/" in route
+    patient_id = troute.id if is_edit else None
+
+    # Datos iniciales
+    p_data = {}
+    if is_edit:
+        p_data = db.get_patient(patient_id)
+        if not p_data:
+            page.go("/pacientes")
+            return
+
+    # Inputs
+    txt_nombre = ft.TextField(label="Nombre Completo", text_size=14, border_color=ft.Colors.TEAL, value=p_data.get("nombre", ""))
+    txt_domicilio = ft.TextField(label="Domicilio", text_size=14, border_color=ft.Colors.TEAL, value=p_data.get("domicilio", ""))
+    txt_telefono = ft.TextField(label="Teléfono", keyboard_type=ft.KeyboardType.PHONE, text_size=14, border_color=ft.Colors.TEAL, value=p_data.get("telefono", ""))
+
+    # Fecha y Edad calculada
+    def on_dob_change(e):
+        age_lbl.value = f"Edad: {calculate_age_str(txt_nacimiento.value)}"
+        age_lbl.update()
+
+    txt_nacimiento = ft.TextField(
+        label="Fecha Nac. (YYYY-MM-DD)", 
+        hint_text="Ej: 1990-12-31", 
+        text_size=14, 
+        border_color=ft.Colors.TEAL,
+        value=p_data.get("fecha_nacimiento", ""),
+        on_change=on_dob_change
+    )
+    initial_age = calculate_age_str(p_data.get("fecha_nacimiento", ""))
+    age_lbl = ft.Text(f"Edad: {initial_age}", size=14, weight="bold", color=ft.Colors.TEAL_800)
+
+    txt_nota = ft.TextField(label="Antecedentes / Notas", multiline=True, min_lines=3, border_color=ft.Colors.TEAL, value=p_data.get("nota", ""))
+
+    # Sliders (extraer helper)
+    v_vata = create_compact_slider("Vata (Aire)", ft.Colors.BLUE, p_data.get("prakruti_vata", 5))
+    v_pitta = create_compact_slider("Pitta (Fuego)", ft.Colors.RED, p_data.get("prakruti_pitta", 5))
+    v_kapha = create_compact_slider("Kapha (Tierra)", ft.Colors.GREEN, p_data.get("prakruti_kapha", 5))
+
+    g_sattva = create_compact_slider("Sattva", ft.Colors.AMBER, p_data.get("prakruti_sattva", 5))
+    g_rajas = create_compact_slider("Rajas", ft.Colors.ORANGE, p_data.get("prakruti_rajas", 5))
+    g_tamas = create_compact_slider("Tamas", ft.Colors.GREY, p_data.get("prakruti_tamas", 5))
+
+    # Campo del paciente -> control del que se lee (y en el que se restaura el borrador)
+    fields = {
+        "nombre": txt_nombre,
+        "domicilio": txt_domicilio,
+        "telefono": txt_telefono,
+        "fecha_nacimiento": txt_nacimiento,
+        "nota": txt_nota,
+        "prakruti_vata": v_vata.controls[1],
+        "prakruti_pitta": v_pitta.controls[1],
+        "prakruti_kapha": v_kapha.controls[1],
+        "prakruti_sattva": g_sattva.controls[1],
+        "prakruti_rajas": g_rajas.controls[1],
+        "prakruti_tamas": g_tamas.controls[1],
+    }
+    draft_banner = autosave_form(app, route, fields)
+    age_lbl.value = f"Edad: {calculate_age_str(txt_nacimiento.value)}"
+
+    def guardar_paciente(e):
+        if not txt_nombre.value:
+            txt_nombre.error_text = "El nombre es obligatorio"
+            txt_nombre.update()
+            return
+
+        data = {"id": patient_id}  # None si es nuevo
+        data.update((f, c.value) for f, c in fields.items())
+        future = worker.save_patient(data)
+        app.drafts.discard_when_saved(route, future)
+        if is_edit:
+            # Actualización optimista: la ficha se ve modificada aunque la escritura siga en cola
+            db.put_patient(dict(data, id=int(patient_id)))
+            app.on_patient_saved(data, int(patient_id))
+            future.add_done_callback(lambda f: app.on_write_done(f, on_error=lambda: app.on_patient_save_failed(int(patient_id))))
+        else:
+            # Paciente nuevo: su tarjeta se añade cuando la base le asigna id
+            future.add_done_callback(lambda f: app.on_write_done(f, lambda pid: app.on_patient_saved(data, pid)))
+        page.snack_bar = ft.SnackBar(ft.Text("Paciente guardado correctamente"))
+        page.snack_bar.open = True
+        page.go("/pacientes")
+
+    title_text = "Editar Ficha" if is_edit else "Nueva Ficha"
+
+    return ft.View(
+        route,
+        [
+            ft.AppBar(title=ft.Text(title_text), bgcolor=ft.Colors.TEAL_700, color=ft.Colors.WHITE),
+            ft.Container(
+                padding=20,
+                content=ft.Column([
+                    draft_banner,
+                    ft.Text("Datos Personales", size=16, weight="bold", color=ft.Colors.TEAL_900),
+                    txt_nombre,
+                    txt_domicilio,
+                    ft.Row([ft.Column([txt_nacimiento], expand=True), ft.Column([age_lbl], expand=False)], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
+                    txt_telefono,
+                    ft.Divider(),
+                    ft.Text("Constitución Prakruti (Doshas)", size=16, weight="bold", color=ft.Colors.TEAL_900),
+                    ft.Row([v_vata, v_pitta, v_kapha], alignment=ft.MainAxisAlignment.SPACE_EVENLY),
+                    ft.Divider(),
+                    ft.Text("Estado Mental (Gunas)", size=16, weight="bold", color=ft.Colors.TEAL_900),
+                    ft.Row([g_sattva, g_rajas, g_tamas], alignment=ft.MainAxisAlignment.SPACE_EVENLY),
+                    ft.Divider(),
+                    txt_nota,
+                    ft.Container(height=20),
+                    ft.ElevatedButton(
+                        "Guardar Ficha", 
+                        icon=ft.Icons.SAVE, 
+                        bgcolor=ft.Colors.TEAL_700, 
+                        color=ft.Colors.WHITE, 
+                        style=ft.ButtonStyle(shape=ft.RoundedRectangleBorder(radius=8)),
+                        width=float('inf'), 
+                        height=50,
+                        on_click=guardar_paciente
+                    )
+                ] )
+            )
+        ],
+        bgcolor=ft.Colors.WHITE,
+        scroll=ft.ScrollMode.AUTO
+    )
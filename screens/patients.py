@@ -0,0 +1,123 @@
+import flet as ft
+
+from database import PAGE_SIZE, SEARCH_LIMIT
+from screens.common import debounce_search, patient_card
+
+
+def build(app, troute):
+    """Listado paginado de pacientes con buscador."""
+    page, db, worker = app.page, app.db, app.worker
+    list_state = app.list_state
+    patient_list = ft.ListView(expand=True, spacing=5, on_scroll_interval=100)
+    # Estado de la paginación: cursor de la siguiente página y si hay una carga en curso
+    paging = {"cursor": None, "done": False, "loading": False}
+    list_state.update({"list": patient_list, "paging": paging, "cards": {}})
+
+    def load_next_page():
+        if paging["done"] or paging["loading"]:
+            return
+        paging["loading"] = True
+        pacientes_page, paging["cursor"] = db.get_patients_page(paging["cursor"], PAGE_SIZE)
+        paging["done"] = paging["cursor"] is None
+        for p in pacientes_page:
+            list_state["cards"][p['id']] = patient_card(page, p)
+            patient_list.controls.append(list_state["cards"][p['id']])
+        paging["loading"] = False
+
+    def on_list_scroll(e: ft.OnScrollEvent):
+        # Cargar la siguiente página al acercarse al final de la lista
+        if e.pixels >= e.max_scroll_extent - 300 and not paging["done"]:
+            load_next_page()
+            patient_list.update()
+
+    patient_list.on_scroll = on_list_scroll
+    load_next_page()
+
+    if not patient_list.controls:
+        patient_list.controls.append(
+            ft.Container(
+                content=ft.Text("No hay pacientes registrados.", italic=True, color=ft.Colors.GREY_700),
+                alignment=ft.alignment.center,
+                padding=40
+            )
+        )
+
+    # --- Buscador ---
+    search_results = ft.ListView(expand=True, spacing=5, visible=False)
+
+    def show_results(visible):
+        search_results.visible = visible
+        patient_list.visible = not visible
+
+    def run_search(text, is_current):
+        results = worker.read("search_patients", text, SEARCH_LIMIT).result()
+        if not is_current():
+            return
+        if results:
+            search_results.controls = [patient_card(page, p) for p in results]
+        else:
+            search_results.controls = [
+                ft.Container(
+                    content=ft.Text("Sin resultados.", italic=True, color=ft.Colors.GREY_700),
+                    alignment=ft.alignment.center,
+                    padding=40
+                )
+            ]
+        show_results(True)
+        page.update()
+
+    def clear_search():
+        show_results(False)
+        page.update()
+
+    txt_buscar = ft.TextField(
+        hint_text="Buscar por nombre o teléfono",
+        prefix_icon=ft.Icons.SEARCH,
+        text_size=14,
+        border_color=ft.Colors.TEAL,
+        bgcolor=ft.Colors.WHITE
+    )
+    debounce_search(txt_buscar, run_search, clear_search)
+
+    return ft.View(
+        "/pacientes",
+        [
+            ft.AppBar(
+                title=ft.Text("Pacientes"),
+                bgcolor=ft.Colors.TEAL_700,
+                color=ft.Colors.WHITE,
+                actions=[
+                    ft.IconButton(ft.Icons.MANAGE_SEARCH, icon_color=ft.Colors.WHITE, tooltip="Buscar en consultas", on_click=lambda _: page.go("/buscar_consultas")),
+                    ft.PopupMenuButton(
+                        icon_color=ft.Colors.WHITE,
+                        items=[
+                            ft.PopupMenuItem(text="Importar CSV / JSONL", icon=ft.Icons.UPLOAD_FILE, on_click=lambda _: app.import_picker.pick_files(allow_multiple=True, allowed_extensions=["csv", "jsonl"])),
+                            ft.PopupMenuItem(text="Exportar", icon=ft.Icons.DOWNLOAD, on_click=lambda _: app.export_picker.get_directory_path()),
+                            ft.PopupMenuItem(text="Copia de seguridad", icon=ft.Icons.BACKUP, on_click=lambda _: app.backup_picker.get_directory_path()),
+                        ]
+                    )
+                ]
+            ),
+            ft.Container(
+                padding=15,
+                content=ft.Column([
+                    txt_buscar,
+                    patient_list,
+                    search_results,
+                    ft.Container(height=10),
+                    ft.FloatingActionButton(
+                        icon=ft.Icons.ADD,
+                        bgcolor=ft.Colors.DEEP_ORANGE_500,
+                        on_click=lambda _: page.go("/nuevo_paciente")
+                    )
+                ], expand=True),
+                gradient=ft.LinearGradient(
+                    begin=ft.alignment.top_center, 
+                    end=ft.alignment.bottom_center, 
+                    colors=[ft.Colors.ORANGE_50, ft.Colors.WHITE]
+                ),
+                expand=True
+            )
+        ],
+        padding=0
+    )
@@ -0,0 +1,79 @@
+import datetime
+import os
+
+import flet as ft
+
+from perf import monitor
+
+
+def build(app, troute):
+    """Pantalla oculta de rendimiento (Ctrl+Shift+P)."""
+    page = app.page
+
+    def on_toggle(e):
+        monitor.set_enabled(e.control.value)
+        page.go("/debug/perf")
+
+    def on_clear(e):
+        monitor.clear()
+        page.go("/debug/perf")
+
+    def on_dump(e):
+        path = os.path.join(
+            os.path.dirname(os.path.abspath(app.db_file)),
+            f"perf_{datetime.datetime.now():%Y%m%d_%H%M%S}.json"
+        )
+        app.show_message(f"Mediciones guardadas en {monitor.dump(path)}")
+
+    def stats_table(title, stats, limit=None):
+        rows = sorted(stats.items(), key=lambda item: item[1]["p95_ms"], reverse=True)[:limit]
+        return ft.Column([
+            ft.Text(title, weight="bold", size=16, color=ft.Colors.TEAL_800),
+            ft.DataTable(
+                columns=[ft.DataColumn(ft.Text("Nombre")), ft.DataColumn(ft.Text("n"), numeric=True),
+                         ft.DataColumn(ft.Text("p50 ms"), numeric=True), ft.DataColumn(ft.Text("p95 ms"), numeric=True)],
+                rows=[
+                    ft.DataRow([ft.DataCell(ft.Text(name, size=12, selectable=True)), ft.DataCell(ft.Text(str(s["n"]))),
+                                ft.DataCell(ft.Text(f"{s['p50_ms']:.2f}")), ft.DataCell(ft.Text(f"{s['p95_ms']:.2f}"))])
+                    for name, s in rows
+                ],
+            ),
+        ])
+
+    summary = monitor.summary()
+    # Para cada ruta: tiempo en base de datos y en construir controles
+    builds = {}
+    for sample in list(monitor.samples):
+        if sample["tipo"] == "ruta":
+            builds.setdefault(sample["nombre"], []).append(sample)
+    phases = [
+        ft.Text(
+            f"{name}: base de datos {sum(s['db_ms'] for s in samples) / len(samples):.2f} ms, "
+            f"controles {sum(s['controles_ms'] for s in samples) / len(samples):.2f} ms (media)",
+            size=12
+        )
+        for name, samples in builds.items()
+    ]
+    startup = [ft.Text(f"{phase}: {ms:.1f} ms", size=12) for phase, ms in app.startup.items()]
+    return ft.View(
+        "/debug/perf",
+        [
+            ft.AppBar(title=ft.Text("Rendimiento"), bgcolor=ft.Colors.BLUE_GREY_700, color=ft.Colors.WHITE),
+            ft.Row([
+                ft.Switch(label="Instrumentación activa", value=monitor.enabled, on_change=on_toggle),
+                ft.TextButton("Actualizar", icon=ft.Icons.REFRESH, on_click=lambda _: page.go("/debug/perf")),
+                ft.TextButton("Vaciar", icon=ft.Icons.DELETE_SWEEP, on_click=on_clear),
+                ft.TextButton("Guardar JSON", icon=ft.Icons.SAVE_ALT, on_click=on_dump),
+            ], wrap=True),
+            ft.Text("Arranque de esta sesión", weight="bold", size=16, color=ft.Colors.TEAL_800),
+            *startup,
+            ft.Text(f"{len(monitor.samples)} muestras", color=ft.Colors.GREY_700),
+            stats_table("Construcción de vistas", summary.get("ruta", {})),
+            *phases,
+            stats_table("page.update()", summary.get("update", {})),
+            stats_table("Navegación completa", summary.get("navegacion", {})),
+            stats_table("Consultas SQL (las 20 más lentas por p95)", summary.get("sql", {}), limit=20),
+        ],
+        bgcolor=ft.Colors.WHITE,
+        scroll=ft.ScrollMode.AUTO
+    )
@@ -0,0 +1,134 @@
+import flet as ft
+
+from analytics import MOVING_WINDOW, monthly_trends
+from database import TREND_FIELDS
+
+# Campo -> (etiqueta, color), en el orden de TREND_FIELDS
+SERIES = {
+    "vikruti_vata": ("Vata", ft.Colors.BLUE),
+    "vikruti_pitta": ("Pitta", ft.Colors.RED),
+    "vikruti_kapha": ("Kapha", ft.Colors.GREEN),
+    "guna_sattva": ("Sattva", ft.Colors.AMBER),
+    "guna_rajas": ("Rajas", ft.Colors.ORANGE),
+    "guna_tamas": ("Tamas", ft.Colors.GREY),
+}
+# Meses que se listan en la tabla bajo los gráficos
+TABLE_MONTHS = 12
+
+
+def build(app, troute):
+    """Tendencias mensuales de vikruti y gunas: de toda la clínica (/tendencias) o de un paciente."""
+    page, db = app.page, app.db
+    patient_id = troute.id if troute.match("/tendencias/:id") else None
+    if patient_id is not None:
+        patient = db.get_patient(patient_id)
+        if not patient:
+            page.go("/pacientes")
+            return
+        title = f"Tendencias de {patient['nombre']}"
+        back = f"/paciente/{patient_id}"
+    else:
+        title = "Tendencias de la Clínica"
+        back = "/"
+
+    trends = monthly_trends(db.get_monthly_trends(patient_id))
+    months = trends["meses"]
+    # En la clínica se grafica la media móvil, que suaviza los meses con pocas consultas
+    series, series_label = ("medias", "media mensual") if patient_id else ("media_movil", f"media móvil de {MOVING_WINDOW} meses")
+
+    def chart(fields):
+        step = max(1, len(months) // 6)
+        return ft.Container(
+            height=220,
+            padding=ft.padding.only(top=10, right=15),
+            content=ft.LineChart(
+                data_series=[
+                    ft.LineChartData(
+                        data_points=[
+                            ft.LineChartDataPoint(i, round(float(v), 2))
+                            for i, v in enumerate(trends[series][:, TREND_FIELDS.index(f)])
+                        ],
+                        color=SERIES[f][1],
+                        stroke_width=2,
+                        curved=True,
+                    )
+                    for f in fields
+                ],
+                min_y=0,
+                max_y=10,
+                min_x=0,
+                max_x=max(len(months) - 1, 1),
+                left_axis=ft.ChartAxis(labels_size=30, labels_interval=2),
+                bottom_axis=ft.ChartAxis(
+                    labels_size=25,
+                    labels=[
+                        ft.ChartAxisLabel(value=i, label=ft.Text(months[i], size=9, color=ft.Colors.GREY_700))
+                        for i in range(0, len(months), step)
+                    ],
+                ),
+                horizontal_grid_lines=ft.ChartGridLines(interval=2, color=ft.Colors.GREY_200, width=1),
+                expand=True,
+            ),
+        )
+
+    def legend(fields):
+        return ft.Row([
+            ft.Row([ft.Container(width=10, height=10, bgcolor=SERIES[f][1], border_radius=5), ft.Text(SERIES[f][0], size=12)], spacing=4)
+            for f in fields
+        ], spacing=15)
+
+    def change_text(field):
+        if trends["cambio"] is None:
+            return ft.Text(f"{SERIES[field][0]}: -", size=12)
+        change = trends["cambio"][TREND_FIELDS.index(field)]
+        arrow = "▲" if change > 0.05 else "▼" if change < -0.05 else "="
+        return ft.Text(f"{SERIES[field][0]}: {arrow} {change:+.1f}", size=12, color=SERIES[field][1])
+
+    table = ft.DataTable(
+        column_spacing=12,
+        columns=[ft.DataColumn(ft.Text("Mes")), ft.DataColumn(ft.Text("n"), numeric=True)] + [
+            ft.DataColumn(ft.Text(SERIES[f][0][0]), numeric=True) for f in TREND_FIELDS
+        ],
+        rows=[
+            ft.DataRow(
+                [ft.DataCell(ft.Text(months[i], size=12)), ft.DataCell(ft.Text(str(trends["consultas"][i]), size=12))] + [
+                    ft.DataCell(ft.Text(f"{v:.1f}", size=12)) for v in trends["medias"][i]
+                ]
+            )
+            for i in range(len(months) - 1, max(len(months) - 1 - TABLE_MONTHS, -1), -1)
+        ],
+    )
+
+    if months:
+        content = [
+            ft.Text(f"{int(trends['consultas'].sum())} consultas en {len(months)} meses ({months[0]} a {months[-1]})", color=ft.Colors.GREY_700),
+            ft.Text(f"Vikruti ({series_label})", size=16, weight="bold", color=ft.Colors.TEAL_900),
+            legend(TREND_FIELDS[:3]),
+            chart(TREND_FIELDS[:3]),
+            ft.Text(f"Gunas ({series_label})", size=16, weight="bold", color=ft.Colors.TEAL_900),
+            legend(TREND_FIELDS[3:]),
+            chart(TREND_FIELDS[3:]),
+            ft.Divider(),
+            ft.Text(f"Último mes frente a los {MOVING_WINDOW} anteriores", weight="bold"),
+            ft.Row([change_text(f) for f in TREND_FIELDS], wrap=True, spacing=15),
+            ft.Divider(),
+            ft.Text("Medias por mes", weight="bold"),
+            ft.Row([table], scroll=ft.ScrollMode.AUTO),
+        ]
+    else:
+        content = [ft.Text("No hay consultas con fecha registradas.", italic=True)]
+
+    return ft.View(
+        troute.route,
+        [
+            ft.AppBar(
+                leading=ft.IconButton(ft.Icons.ARROW_BACK, on_click=lambda _: page.go(back)),
+                title=ft.Text(title),
+                bgcolor=ft.Colors.TEAL_700,
+                color=ft.Colors.WHITE
+            ),
+            ft.Container(padding=15, content=ft.Column(content)),
+        ],
+        bgcolor=ft.Colors.WHITE,
+        scroll=ft.ScrollMode.AUTO
+    )
@@ -0,0 +1,69 @@
+"""Modo servidor: la app web para varias personas a la vez (recepción y terapeutas).
+
+    python server.py
+
+Cada navegador abre una sesión de main(page). Todas comparten una misma
+AyurvedaDB y un DBWorker (un hilo escritor y SERVER_READ_THREADS lectores,
+cada uno con su conexión, sobre WAL); cada sesión tiene su propia caché y
+recibe por page.pubsub las escrituras de las demás (ver App.on_remote_change).
+"""
+import os
+import threading
+
+import flet as ft
+
+import main as app
+from database import AyurvedaDB
+from perf import monitor
+from worker import DBWorker
+
+# Hilos (y conexiones) de lectura compartidos por todas las sesiones
+SERVER_READ_THREADS = 4
+SERVER_PORT = int(os.environ.get("AYURVEDA_PORT", "8550"))
+
+
+class SharedDatabase:
+    """Base de datos del proceso: se abre y migra una vez, con la primera sesión."""
+
+    def __init__(self, db_file, read_threads=SERVER_READ_THREADS):
+        self.db_file = db_file
+        self.read_threads = read_threads
+        self.db = None
+        self.worker = None
+        # Archivo de una base antigua importado al abrir, si lo hubo
+        self.imported = None
+        self._lock = threading.Lock()
+
+    def open(self):
+        """Devuelve (AyurvedaDB, DBWorker); la primera llamada los crea y las demás esperan a que estén."""
+        with self._lock:
+            if self.worker is None:
+                db = AyurvedaDB(self.db_file)
+                monitor.attach(db)
+                self.imported = db.import_legacy_databases(os.path.dirname(os.path.abspath(self.db_file)))
+                self.worker = DBWorker(db, self.read_threads)
+                self.db = db
+            return self.db, self.worker
+
+    def close(self):
+        with self._lock:
+            if self.worker is not None:
+                self.worker.close()
+                self.db.close()
+                self.worker = self.db = None
+
+
+def serve(db_file=app.DB_FILE, port=SERVER_PORT):
+    shared = SharedDatabase(db_file)
+
+    def session(page: ft.Page):
+        app.main(page, shared)
+
+    try:
+        ft.app(target=session, view=ft.AppView.WEB_BROWSER, port=port)
+    finally:
+        shared.close()
+
+
+if __name__ == "__main__":
+    serve()
@@ -0,0 +1,226 @@
+"""Sincronización por deltas entre dispositivos a través de un servidor.
+
+Solo se intercambian los registros cambiados desde un cursor (el seq del
+registro de cambios de quien los sirve, ver AyurvedaDB.changes_since):
+
+    GET  /cambios?desde=<cursor>&limite=<n>  -> {"cambios": [...], "cursor": <n>}
+    POST /cambios  {"cambios": [...]}         -> {"aplicados": <n>}
+
+El dispositivo principal envía sus cambios y los demás los reciben como
+réplicas de solo lectura: los ids de sus registros propios chocarían con los
+del principal. Un dispositivo que ya envía no puede recibir, uno que recibe no
+puede enviar, y una réplica con registros propios no se sincroniza; si aun
+así los cambios recibidos chocan con los de la base (ver
+AyurvedaDB.apply_changes), la sincronización falla con SyncConflict (409 en el
+servidor) sin aplicar el bloque. SyncServer es un servidor de referencia,
+útil para pruebas, que guarda los datos en su propia AyurvedaDB:
+
+    python sync.py servidor servidor.db --puerto 8765
+    python sync.py enviar http://localhost:8765 pacientes_v5.db
+    python sync.py recibir http://localhost:8765 otro_dispositivo.db
+"""
+import argparse
+import json
+import threading
+import sys
+import urllib.error
+import urllib.parse
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from database import SYNC_BATCH, AyurvedaDB, SyncConflict
+
+# Claves de los cursores guardados en cada dispositivo
+PUSH_CURSOR = "sync_enviado"
+PULL_CURSOR = "sync_recibido"
+SYNC_TIMEOUT = 30
+
+
+def pull_changes(fetch, db, key, progress=None, log=True):
+    """Aplica en `db` los cambios que devuelve `fetch(cursor)` hasta que no haya más.
+
+    Cada bloque se aplica junto con su cursor (guardado con la clave `key`) en
+    una sola transacción, así que una sincronización cortada continúa donde se
+    quedó. `progress(aplicados)` se llama tras cada bloque. Devuelve el total.
+    """
+    cursor = db.get_sync_cursor(key) or 0
+    total = 0
+    while True:
+        changes, next_cursor = fetch(cursor)
+        if not changes:
+            return total
+        with db.transaction():
+            total += db.apply_changes(changes, log=log)
+            db.set_sync_cursor(key, next_cursor)
+        cursor = next_cursor
+        if progress:
+            progress(total)
+
+
+class SyncClient:
+    """Cliente del protocolo: envía los cambios de `db` y recibe los del servidor."""
+
+    def __init__(self, db, url, timeout=SYNC_TIMEOUT):
+        self.db = db
+        self.url = url.rstrip("/") + "/cambios"
+        self.timeout = timeout
+
+    def _request(self, url, body=None):
+        data = json.dumps(body).encode() if body is not None else None
+        request = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.load(response)
+        except urllib.error.HTTPError as ex:
+            if ex.code == 409:
+                raise SyncConflict(json.load(ex)["error"]) from None
+            raise
+
+    def fetch(self, cursor, limit=SYNC_BATCH):
+        """Cambios del servidor posteriores a `cursor`: (cambios, cursor_siguiente)."""
+        query = urllib.parse.urlencode({"desde": cursor, "limite": limit})
+        result = self._request(f"{self.url}?{query}")
+        return result["cambios"], result["cursor"]
+
+    def push(self, progress=None):
+        """Envía los cambios locales aún no enviados. Devuelve cuántos aceptó el servidor."""
+        if self.db.get_sync_cursor(PULL_CURSOR) is not None:
+            raise SyncConflict("Este dispositivo recibe los cambios del servidor: es una réplica y no envía los suyos")
+        cursor = self.db.get_sync_cursor(PUSH_CURSOR) or 0
+        total = 0
+        while True:
+            changes, next_cursor = self.db.changes_since(cursor)
+            if not changes:
+                return total
+            total += self._request(self.url, {"cambios": changes})["aplicados"]
+            self.db.set_sync_cursor(PUSH_CURSOR, next_cursor)
+            cursor = next_cursor
+            if progress:
+                progress(total)
+
+    def pull(self, progress=None):
+        """Recibe y aplica los cambios del servidor. Devuelve cuántas filas se aplicaron."""
+        if self.db.get_sync_cursor(PUSH_CURSOR) is not None:
+            raise SyncConflict("Este dispositivo envía sus cambios al servidor: es el principal y no recibe")
+        # En una réplica lo recibido no se registra: cualquier cambio registrado se hizo aquí
+        if self.db.changes_since(0, 1)[0]:
+            raise SyncConflict("Esta base tiene registros creados o editados aquí: una réplica no puede tener cambios propios")
+        # Lo recibido no se anota en el registro local: no hay que reenviarlo
+        return pull_changes(self.fetch, self.db, PULL_CURSOR, progress, log=False)
+
+
+class SyncServer:
+    """Servidor de sincronización de referencia sobre una AyurvedaDB propia."""
+
+    def __init__(self, db_path, host="127.0.0.1", port=0):
+        self.db = AyurvedaDB(db_path)
+        self.httpd = ThreadingHTTPServer((host, port), _handler(self.db))
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Atiende peticiones en un hilo aparte (para pruebas); devuelve la URL."""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="sync-servidor", daemon=True)
+        self._thread.start()
+        return self.url
+
+    def serve_forever(self):
+        self.httpd.serve_forever()
+
+    def close(self):
+        if self._thread is not None:
+            self.httpd.shutdown()
+            self._thread.join()
+        self.httpd.server_close()
+        self.db.close()
+
+
+def _handler(db):
+    # Las escrituras de varios clientes se serializan: cada envío es una transacción
+    write_lock = threading.Lock()
+
+    class SyncHandler(BaseHTTPRequestHandler):
+        def _reply(self, status, body):
+            data = json.dumps(body, ensure_ascii=False).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            url = urllib.parse.urlparse(self.path)
+            if url.path != "/cambios":
+                return self._reply(404, {"error": "ruta desconocida"})
+            query = urllib.parse.parse_qs(url.query)
+            try:
+                cursor = int(query.get("desde", ["0"])[0])
+                limit = min(int(query.get("limite", [str(SYNC_BATCH)])[0]), SYNC_BATCH)
+            except ValueError:
+                return self._reply(400, {"error": "desde y limite deben ser números"})
+            changes, next_cursor = db.changes_since(cursor, limit)
+            self._reply(200, {"cambios": changes, "cursor": next_cursor})
+
+        def do_POST(self):
+            if self.path != "/cambios":
+                return self._reply(404, {"error": "ruta desconocida"})
+            try:
+                changes = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))["cambios"]
+            except (ValueError, KeyError):
+                return self._reply(400, {"error": "se esperaba {\"cambios\": [...]}"})
+            try:
+                with write_lock, db.transaction():
+                    applied = db.apply_changes(changes)
+            except SyncConflict as ex:
+                return self._reply(409, {"error": str(ex)})
+            self._reply(200, {"aplicados": applied})
+
+        def log_message(self, format, *args):
+            pass  # sin una línea en stderr por petición
+
+    return SyncHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="orden", required=True)
+    server = commands.add_parser("servidor", help="servidor de sincronización de referencia")
+    server.add_argument("base")
+    server.add_argument("--host", default="127.0.0.1")
+    server.add_argument("--puerto", type=int, default=8765)
+    for name, help_text in [("enviar", "envía los cambios locales"), ("recibir", "recibe los cambios del servidor")]:
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("url")
+        command.add_argument("base")
+    args = parser.parse_args()
+
+    if args.orden == "servidor":
+        server = SyncServer(args.base, args.host, args.puerto)
+        print(f"Sincronización en {server.url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.close()
+        return
+    db = AyurvedaDB(args.base)
+    try:
+        client = SyncClient(db, args.url)
+        if args.orden == "enviar":
+            print(f"{client.push()} filas enviadas")
+        else:
+            print(f"{client.pull()} filas recibidas")
+    except SyncConflict as ex:
+        print(f"Conflicto de sincronización: {ex}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
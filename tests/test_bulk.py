@@ -0,0 +1,76 @@
+"""Importación masiva (bulk.py) sobre una base temporal.
+
+    python -m unittest discover tests
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import bulk  # noqa: E402
+from database import AyurvedaDB  # noqa: E402
+from test_sync import consultation  # noqa: E402
+
+
+class ImportTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.db = AyurvedaDB(os.path.join(self.folder, "pacientes.db"))
+
+    def tearDown(self):
+        self.db.close()
+        shutil.rmtree(self.folder)
+
+    def write(self, name, rows):
+        path = os.path.join(self.folder, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+        return path
+
+    def motivos(self, nombre):
+        pid = self.db.search_patients(nombre)[0]["id"]
+        return sorted(c["motivo"] for c in self.db.get_consultations_page(pid, None, 10)[0])
+
+    def test_names_match_like_nocase(self):
+        patients = self.write("pacientes.jsonl", [{"nombre": n} for n in ("Ángel Pérez", "Óscar Ruiz", "ana lopez")])
+        rows = [
+            dict(consultation(None, "insomnio"), paciente_id=None, paciente_nombre="Ángel Pérez"),
+            dict(consultation(None, "migraña"), paciente_id=None, paciente_nombre="óscar ruiz"),
+            dict(consultation(None, "ansiedad"), paciente_id=None, paciente_nombre="Ana Lopez"),
+        ]
+        # Igual que COLLATE NOCASE: "óscar" no es "Óscar" (solo se igualan las letras ASCII)
+        self.assertEqual(bulk.import_files(self.db, [patients, self.write("consultas.jsonl", rows)]), (3, 2, 1))
+        self.assertEqual(self.motivos("Ángel"), ["insomnio"])
+        self.assertEqual(self.motivos("ana"), ["ansiedad"])
+
+    def test_ids_resolve_across_imports(self):
+        patients = self.write("pacientes.jsonl", [{"id": 70, "nombre": "Ana"}, {"id": 71, "nombre": "Luis"}])
+        self.assertEqual(bulk.import_files(self.db, [patients]), (2, 0, 0))
+        # Otra importación (otro Importer): los ids de origen se traducen con importacion_ids
+        rows = [
+            dict(consultation(None, "insomnio"), paciente_id=71),
+            dict(consultation(None, "migraña"), paciente_id="70"),
+            dict(consultation(None, "sin paciente"), paciente_id=1),  # el 1 de la base no es el 1 de origen
+        ]
+        self.assertEqual(bulk.import_files(self.db, [self.write("consultas.jsonl", rows)]), (0, 2, 1))
+        self.assertEqual(self.motivos("Ana"), ["migraña"])
+        self.assertEqual(self.motivos("Luis"), ["insomnio"])
+
+    def test_ids_are_scoped_by_source(self):
+        clinic = self.write("clinica/pacientes.jsonl", [{"id": 1, "nombre": "Ana"}])
+        other = self.write("otra/pacientes.jsonl", [{"id": 1, "nombre": "Luis"}])
+        bulk.import_files(self.db, [clinic, other])
+        rows = [dict(consultation(None, "insomnio"), paciente_id=1)]
+        self.assertEqual(bulk.import_files(self.db, [self.write("clinica/consultas.jsonl", rows)]), (0, 1, 0))
+        self.assertEqual(self.motivos("Ana"), ["insomnio"])
+        self.assertEqual(self.motivos("Luis"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+"""Consultas y migraciones de AyurvedaDB sobre una base temporal.
+
+    python -m unittest discover tests
+"""
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import database  # noqa: E402
+from database import MIGRATIONS, AyurvedaDB  # noqa: E402
+from test_sync import consultation, patient, table  # noqa: E402
+
+
+class Crash(Exception):
+    pass
+
+
+def crash_after(version):
+    """MIGRATIONS con la migración `version` terminada pero sin llegar a subir la versión."""
+    def run(migration):
+        def crashing(db):
+            migration(db)
+            raise Crash()
+        return crashing
+    return [(v, d, run(m) if v == version else m) for v, d, m in MIGRATIONS]
+
+
+class MigrationTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.path = os.path.join(self.folder, "pacientes.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def open(self, migrations):
+        with mock.patch.object(database, "MIGRATIONS", migrations):
+            return AyurvedaDB(self.path)
+
+    def test_rollups_survive_crash_before_version_bump(self):
+        db = self.open(MIGRATIONS[:3])
+        with db.transaction() as conn:
+            conn.execute("INSERT INTO pacientes (nombre) VALUES ('Ana')")
+            for fecha in ("2024-03-01", "2024-03-15", "2024-04-02"):
+                values = consultation(1, "insomnio", fecha)
+                conn.execute(
+                    f"INSERT INTO consultas ({', '.join(values)}) VALUES ({', '.join('?' for _ in values)})",
+                    list(values.values()),
+                )
+        db.close()
+
+        with self.assertRaises(Crash):
+            self.open(crash_after(4))
+        db = self.open(MIGRATIONS)
+        self.assertEqual(db.schema_version(), MIGRATIONS[-1][0])
+        self.assertEqual([(r[0], r[1]) for r in table(db, "tendencia_mensual")], [("2024-03", 2), ("2024-04", 1)])
+        self.assertEqual(table(db, "migracion_progreso"), [])
+        db.close()
+
+    def test_drafts_keep_device_after_crash_before_version_bump(self):
+        db = self.open(MIGRATIONS[:9])
+        with db.transaction() as conn:
+            conn.execute("INSERT INTO borradores (ruta, datos, actualizado) VALUES ('/nuevo_paciente', '{}', '')")
+        db.close()
+
+        with self.assertRaises(Crash):
+            self.open(crash_after(10))
+        with sqlite3.connect(self.path) as conn:
+            conn.execute("INSERT INTO borradores VALUES ('tablet', '/nueva_consulta/1', '{}', '')")
+        db = self.open(MIGRATIONS)
+        self.assertEqual(db.get_draft("local", "/nuevo_paciente"), {})
+        self.assertEqual(db.get_draft("tablet", "/nueva_consulta/1"), {})
+        db.close()
+
+
+class QueryTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.db = AyurvedaDB(os.path.join(self.folder, "pacientes.db"))
+
+    def tearDown(self):
+        self.db.close()
+        shutil.rmtree(self.folder)
+
+    def test_search_patients_sorts_before_limit(self):
+        for nombre in ("Marta Zapata", "Mario Ruiz", "Marco Abad", "María Gil"):
+            self.db.save_patient(patient(nombre))
+        found = self.db.search_patients("mar", limit=2)
+        self.assertEqual([p["nombre"] for p in found], ["Marco Abad", "Mario Ruiz"])
+
+    def test_search_patients_by_phone_groups(self):
+        ana = self.db.save_patient(dict(patient("Ana"), telefono="+34 551-234-567"))
+        for text in ("34 55", "+34 551 234", "34551234", "ana 34 551-23"):
+            self.assertEqual([p["id"] for p in self.db.search_patients(text)], [ana], text)
+
+    def test_history_pages_with_null_fecha(self):
+        ana = self.db.save_patient(patient("Ana"))
+        fechas = ["2024-03-01", None, "2024-05-01", None, "2024-03-01", None, "2024-01-01"]
+        ids = [self.db.save_consultation(consultation(ana, f"consulta {i}", f)) for i, f in enumerate(fechas)]
+        seen, cursor = [], None
+        while True:
+            page, cursor = self.db.get_consultations_page(ana, cursor, 2)
+            seen += [c["id"] for c in page]
+            if cursor is None:
+                break
+        # Fecha descendente (empates por id descendente) y las consultas sin fecha al final
+        self.assertEqual(seen, [ids[2], ids[4], ids[0], ids[6], ids[5], ids[3], ids[1]])
+
+    def test_consultation_search_continues_past_rank_window(self):
+        ana = self.db.save_patient(patient("Ana"))
+        ids = [self.db.save_consultation(consultation(ana, f"insomnio {i}")) for i in range(7)]
+        self.db.save_consultation(consultation(ana, "migraña"))
+        seen, offset = [], 0
+        with mock.patch.object(database, "CONSULTATION_RANK_WINDOW", 3):
+            while offset is not None:
+                results, offset = self.db.search_consultations("insomnio", offset, 2)
+                seen += [r["id"] for r in results]
+        # Las 3 más recientes (la ventana) primero, en cualquier orden de relevancia; después el resto
+        self.assertEqual(sorted(seen[:3]), ids[4:])
+        self.assertEqual(seen[3:], ids[3::-1])
+
+    def test_trends_skip_invalid_months(self):
+        ana = self.db.save_patient(patient("Ana"))
+        for fecha in ("2024-03-01", "2024-03", "5/2/2024", "2024-13-01", "", None):
+            self.db.save_consultation(consultation(ana, "insomnio", fecha))
+        self.assertEqual([(r["mes"], r["n"]) for r in self.db.get_monthly_trends()], [("2024-03", 2)])
+        self.assertEqual([(r["mes"], r["n"]) for r in self.db.get_monthly_trends(ana)], [("2024-03", 2)])
+
+
+if __name__ == "__main__":
+    unittest.main()
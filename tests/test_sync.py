@@ -0,0 +1,116 @@
+"""Sincronización de ida y vuelta contra SyncServer (principal -> servidor -> réplica).
+
+    python -m unittest discover tests
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from database import PATIENT_FIELDS, AyurvedaDB, SyncConflict  # noqa: E402
+from sync import SyncClient, SyncServer  # noqa: E402
+
+
+def patient(nombre, **values):
+    return dict({f: 5 for f in PATIENT_FIELDS[5:]}, nombre=nombre, telefono="600", **values)
+
+
+def consultation(patient_id, motivo, fecha="2024-03-01"):
+    return {
+        "paciente_id": patient_id, "fecha": fecha, "motivo": motivo, "sintomas": f"{motivo} leve",
+        "vikruti_vata": 3, "vikruti_pitta": 2, "vikruti_kapha": 1,
+        "guna_sattva": 5, "guna_rajas": 4, "guna_tamas": 3,
+        "tratamiento": "ashwagandha", "detalle": None,
+    }
+
+
+def table(db, name):
+    with db._cursor() as conn:
+        return [tuple(r) for r in conn.execute(f"SELECT * FROM {name} ORDER BY 1, 2")]
+
+
+class SyncRoundTripTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.server = SyncServer(os.path.join(self.folder, "servidor.db"))
+        url = self.server.start()
+        self.main = AyurvedaDB(os.path.join(self.folder, "principal.db"))
+        self.replica = AyurvedaDB(os.path.join(self.folder, "replica.db"))
+        self.main_client = SyncClient(self.main, url)
+        self.replica_client = SyncClient(self.replica, url)
+
+    def tearDown(self):
+        self.main.close()
+        self.replica.close()
+        self.server.close()
+        shutil.rmtree(self.folder)
+
+    def assertSameData(self, a, b):
+        for name in ("pacientes", "consultas", "tendencia_mensual", "tendencia_paciente_mensual"):
+            self.assertEqual(table(a, name), table(b, name), name)
+
+    def test_round_trip(self):
+        ana = self.main.save_patient(patient("Ana"))
+        luis = self.main.save_patient(patient("Luis"))
+        self.main.save_consultation(consultation(ana, "insomnio"))
+        self.main.save_consultation(consultation(luis, "migraña", "2024-04-02"))
+        self.main_client.push()
+        self.replica_client.pull()
+        self.assertSameData(self.main, self.replica)
+        self.assertEqual(len(self.replica.search_consultations("insomnio")[0]), 1)
+
+        # Segunda vuelta: solo viaja el delta (una edición y una consulta nueva)
+        self.main.save_patient(dict(patient("Ana María"), id=ana))
+        self.main.save_consultation(consultation(ana, "ansiedad", "2024-05-03"))
+        self.assertEqual(self.main_client.push(), 2)
+        self.assertEqual(self.replica_client.pull(), 2)
+        self.assertSameData(self.main, self.replica)
+        self.assertEqual(self.replica.get_patient(ana)["nombre"], "Ana María")
+
+    def test_resend_is_ignored(self):
+        ana = self.main.save_patient(patient("Ana"))
+        self.main.save_consultation(consultation(ana, "insomnio"))
+        self.main_client.push()
+        # Un envío repetido (p. ej. cortado antes de guardar el cursor) no duplica nada
+        self.main.set_sync_cursor("sync_enviado", 0)
+        self.main_client.push()
+        self.assertSameData(self.main, self.server.db)
+
+    def test_replica_with_own_records_fails(self):
+        ana = self.main.save_patient(patient("Ana"))
+        self.main.save_consultation(consultation(ana, "insomnio"))
+        self.main_client.push()
+        self.replica_client.pull()
+        own = self.replica.save_consultation(consultation(ana, "consulta de la réplica"))
+
+        self.main.save_consultation(consultation(ana, "consulta del principal"))
+        self.main_client.push()
+        with self.assertRaises(SyncConflict):
+            self.replica_client.pull()
+        self.assertEqual(self.replica.get_consultation(own)["motivo"], "consulta de la réplica")
+
+    def test_conflicting_consultation_is_rejected(self):
+        ana = self.replica.save_patient(patient("Ana"))
+        self.replica.save_consultation(consultation(ana, "insomnio"))
+        self.main.save_patient(patient("Otra"))
+        self.main.save_consultation(consultation(ana, "otra consulta"))
+        # Dos bases con ids propios: la consulta 1 no es la misma, no se pisa ni se omite
+        with self.assertRaises(SyncConflict):
+            self.replica.apply_changes(self.main.changes_since(0)[0], log=False)
+        self.assertEqual(self.replica.get_consultation(1)["motivo"], "insomnio")
+
+    def test_roles_are_exclusive(self):
+        self.main.save_patient(patient("Ana"))
+        self.main_client.push()
+        self.replica_client.pull()
+        with self.assertRaises(SyncConflict):
+            self.main_client.pull()
+        with self.assertRaises(SyncConflict):
+            self.replica_client.push()
+
+
+if __name__ == "__main__":
+    unittest.main()
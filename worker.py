@@ -0,0 +1,126 @@
+import asyncio
+import copy
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# Hilos para lecturas concurrentes
+READ_THREADS = 2
+# Máximo de escrituras en cola que se agrupan en una misma transacción
+MAX_BATCH = 50
+
+
+class DBWorker:
+    """E/S de base de datos fuera del hilo de la interfaz.
+
+    Las lecturas se ejecutan en un pool de hilos y pueden esperarse desde
+    manejadores async con `await worker.run(fn, ...)`. Las escrituras van a
+    una cola atendida por un único hilo escritor, que agrupa en una sola
+    transacción todo lo que encuentre pendiente; cada escritura devuelve un
+    Future que se resuelve tras el commit.
+
+    Con bind() varias sesiones comparten los mismos hilos (y conexiones),
+    cada una con su propia `db` delante de la base (p. ej. su caché).
+    """
+
+    def __init__(self, db, read_threads=READ_THREADS):
+        self.db = db
+        # on_commit(método, args, resultado): se llama tras el commit de cada escritura
+        self.on_commit = None
+        self.readers = ThreadPoolExecutor(max_workers=read_threads, thread_name_prefix="db-lectura")
+        self._queue = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="db-escritura", daemon=True)
+        self._writer.start()
+
+    def bind(self, db, on_commit=None):
+        """DBWorker sobre los mismos hilos que ejecuta los métodos de `db` y avisa con `on_commit`."""
+        worker = copy.copy(self)
+        worker.db = db
+        worker.on_commit = on_commit
+        return worker
+
+    # --- Lecturas ---
+    def read(self, method, *args):
+        """Ejecuta `db.<method>(*args)` en el pool de lectura. Devuelve un Future."""
+        return self.readers.submit(getattr(self.db, method), *args)
+
+    async def run(self, fn, *args):
+        """Ejecuta `fn(*args)` en el pool de lectura sin bloquear el bucle de eventos."""
+        return await asyncio.wrap_future(self.readers.submit(fn, *args))
+
+    # --- Escrituras ---
+    def write(self, method, *args):
+        """Encola `db.<method>(*args)` para el hilo escritor. Devuelve un Future."""
+        future = Future()
+        self._queue.put((future, self, method, args))
+        return future
+
+    def save_patient(self, data):
+        return self.write("save_patient", data)
+
+    def save_consultation(self, data):
+        return self.write("save_consultation", data)
+
+    def flush(self, timeout=None):
+        """Espera a que se hayan escrito todas las escrituras encoladas hasta ahora."""
+        self.write("__flush__").result(timeout)
+
+    def close(self):
+        self._queue.put(None)
+        self._writer.join()
+        self.readers.shutdown()
+
+    def _write_loop(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            jobs = [job]
+            stop = False
+            while len(jobs) < MAX_BATCH:
+                try:
+                    job = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if job is None:
+                    stop = True
+                    break
+                jobs.append(job)
+            self._run_batch(jobs)
+            if stop:
+                return
+
+    def _run_batch(self, jobs):
+        results = []
+        try:
+            with self.db.transaction() as conn:
+                for future, worker, method, args in jobs:
+                    if method == "__flush__":
+                        results.append((future, None, None))
+                        continue
+                    # Un savepoint por escritura: si una falla, las demás siguen
+                    conn.execute("SAVEPOINT escritura")
+                    try:
+                        result = getattr(worker.db, method)(*args)
+                    except Exception as ex:
+                        conn.execute("ROLLBACK TO escritura")
+                        conn.execute("RELEASE escritura")
+                        results.append((future, None, ex))
+                    else:
+                        conn.execute("RELEASE escritura")
+                        results.append((future, result, None))
+        except Exception as ex:
+            for future, _, _, _ in jobs:
+                future.set_exception(ex)
+            return
+
+        for (future, worker, method, args), (_, result, ex) in zip(jobs, results):
+            if ex is not None:
+                future.set_exception(ex)
+                continue
+            if worker.on_commit is not None and method != "__flush__":
+                try:
+                    worker.on_commit(method, args, result)
+                except Exception:
+                    pass  # un aviso fallido no debe dejar sin resolver la escritura
+            future.set_result(result)